@@ -1,14 +1,11 @@
 import streamlit as st
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+
+from utils.reports import create_home_pdf
+from utils.ui import debug_sidebar, page_setup
+from utils.warmup import WARMUP_ENABLED, warmup_status
 
 # Set the title and icon for the app
-st.set_page_config(
-    page_title="IRIS CLASSIFICATION WEB APP",
-    layout="wide"
-)
+page_setup("Home", page_title="IRIS CLASSIFICATION WEB APP", layout="wide")
 
 # Home page content
 st.title("IRIS Classification Project: An Introduction")
@@ -74,36 +71,24 @@ st.markdown("---")
 st.subheader("Generate Report")
 st.info("Download a PDF summary of this page.")
 
-def create_home_pdf():
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    story.append(Paragraph("IRIS Classification Project: An Introduction", styles['h1']))
-    story.append(Paragraph("Welcome to the Interactive Data Analysis and Classification App!", styles['h2']))
-    
-    # Clean up markdown for PDF
-    story.append(Paragraph(intro_markdown.replace('*', ''), styles['BodyText']))
-    story.append(Spacer(1, 12))
-    
-    story.append(Paragraph("The Iris Dataset Overview", styles['h2']))
-    story.append(Paragraph("Dataset Details", styles['h3']))
-    story.append(Paragraph(details_markdown.replace('*', ''), styles['BodyText']))
-    story.append(Spacer(1, 12))
-    
-    story.append(Paragraph("Anatomy of the Iris Flower", styles['h3']))
-    story.append(Paragraph(anatomy_markdown.replace('*', '').replace('    *', ' - '), styles['BodyText']))
-    
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
-pdf_buffer = create_home_pdf()
+@st.cache_resource
+def get_home_pdf():
+    """The home report is static, so it is built once per process, on the first download."""
+    return create_home_pdf(intro_markdown, details_markdown, anatomy_markdown).getvalue()
 
 st.download_button(
     label="Download Home Report (PDF)",
-    data=pdf_buffer,
+    data=get_home_pdf,
     file_name="home_report.pdf",
     mime="application/pdf",
 )
+
+# --- Warm-up status ---
+if WARMUP_ENABLED:
+    status = warmup_status()
+    steps = ", ".join(f"{name} {seconds:.1f} s" for name, seconds in status['steps'].items())
+    st.sidebar.caption(f"Warm-up: {status['state']}" + (f" ({steps})" if steps else ""))
+    if status['error']:
+        st.sidebar.caption(f"Warm-up error: {status['error']}")
+
+debug_sidebar()
@@ -0,0 +1,259 @@
+"""Headless batch scoring with the Classification page's KNN and SVM pipelines.
+
+Examples:
+    python batch_predict.py train --model knn --n-neighbors 5 --output models/knn.joblib
+    python batch_predict.py train --model svm --svm-engine sgd --train-file big.parquet --output models/svm.joblib
+    python batch_predict.py predict --model models/knn.joblib --input measurements.parquet --output scored.parquet
+    python batch_predict.py serve --model models/knn.joblib --port 8502
+    python batch_predict.py update --input new_measurements.csv --state models/online.joblib --export-svm models/svm.joblib
+
+The HTTP server accepts `POST /predict` with a CSV body and streams the
+scored CSV back; `GET /health` describes the loaded model.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from utils.batch import (
+    DEFAULT_CHUNK_ROWS, ChunkedWriter, LimitedReader, PredictionWriter, iter_chunks, load_model, predict_chunk, save_model,
+    score_chunks, score_file
+)
+from utils.data import FEATURE_COLUMNS, SPECIES_COLUMN, get_dataset
+from utils.model_cache import build_pipelines
+from utils.online import OnlineModels, labelled_batch
+from utils.neighbors import KNN_BACKENDS
+from utils.svm import SVM_ENGINES, stream_train_svm
+
+
+def stream_train(args):
+    """Trains the streaming SVM on a labelled file, reading it one chunk at a time."""
+    categories = {}
+    n_rows = [0]
+
+    def chunks():
+        n_rows[0] = 0
+        for df in iter_chunks(args.train_file, args.chunk_rows):
+            for name in df[SPECIES_COLUMN].unique():
+                categories.setdefault(name, len(categories))
+            n_rows[0] += len(df)
+            yield df[FEATURE_COLUMNS].to_numpy(dtype=np.float32), df[SPECIES_COLUMN].map(categories).to_numpy()
+
+    pipeline = stream_train_svm(chunks, args.svm_c, args.random_state, epochs=args.epochs)
+    return pipeline, list(categories), n_rows[0], args.train_file
+
+
+def train(args):
+    if args.train_file:
+        pipeline, target_names, n_rows, source = stream_train(args)
+    else:
+        dataset = get_dataset()
+        X, y = dataset.to_numpy()
+        pipeline = build_pipelines(
+            args.random_state, args.n_neighbors, args.svm_c, args.knn_backend, svm_engine=args.svm_engine,
+            n_samples=len(X)
+        )[args.model]
+        pipeline.fit(X, y)
+        target_names, n_rows, source = dataset.categories, dataset.n_rows, dataset.version
+    params = {
+        "model": args.model,
+        "random_state": args.random_state,
+        "n_neighbors": args.n_neighbors,
+        "svm_c": args.svm_c,
+        "knn_backend": args.knn_backend,
+        "svm_engine": args.svm_engine,
+        "data_version": source,
+    }
+    save_model(args.output, pipeline, target_names, params)
+    print(f"Saved {args.model.upper()} pipeline trained on {n_rows:,} rows to {args.output}")
+
+
+def predict(args):
+    bundle = load_model(args.model)
+
+    def progress(rows, elapsed):
+        print(f"\r{rows:,} rows scored ({rows / elapsed if elapsed else 0:,.0f} rows/s)", end="", file=sys.stderr)
+
+    stats = score_file(bundle, args.input, args.output, args.chunk_rows, proba=not args.no_proba, progress=progress)
+    print(file=sys.stderr)
+    print(
+        f"Scored {stats['rows']:,} rows in {stats['chunks']} chunks, {stats['seconds']:.2f} s "
+        f"({stats['rows_per_second']:,.0f} rows/s) -> {args.output}"
+    )
+
+
+def update(args):
+    """Learns from newly labelled rows without a full refit, saving the updated online models."""
+    import joblib
+
+    if os.path.exists(args.state):
+        models = joblib.load(args.state)
+    else:
+        # New models start from the built-in data so every species is known
+        dataset = get_dataset()
+        models = OnlineModels(dataset.categories, args.n_neighbors, args.svm_c, args.random_state)
+        models.update(*dataset.to_numpy(), source="built-in dataset")
+        print(f"Started new online models from the built-in dataset ({dataset.n_rows:,} rows)")
+
+    for df in iter_chunks(args.input, args.chunk_rows):
+        entry = models.update(*labelled_batch(df, models.categories), source=args.input)
+        print(f"version {entry['version']}: +{entry['rows_added']:,} rows in {entry['seconds'] * 1000:,.1f} ms "
+              f"({entry['total_rows']:,} rows learned)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.state)), exist_ok=True)
+    joblib.dump(models, args.state)
+    print(f"Saved online models version {models.version} to {args.state}")
+    for name, path in [('knn', args.export_knn), ('svm', args.export_svm)]:
+        if path:
+            save_model(path, models.pipeline(name), models.categories, dict(
+                models.params, model=name, online_version=models.version, rows=models.n_rows,
+            ))
+            print(f"Exported the {name.upper()} snapshot for batch scoring to {path}")
+
+
+def make_handler(bundle, chunk_rows, proba):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1 for chunked responses, so a failure mid-stream is visible to the client
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path != '/health':
+                self.send_error(404)
+                return
+            body = json.dumps({
+                "status": "ok",
+                "params": bundle['params'],
+                "target_names": bundle['target_names'],
+                "feature_columns": bundle['feature_columns'],
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self.send_error(404)
+                return
+            length = self.headers.get('Content-Length')
+            if length is None:
+                self.send_error(411, "Content-Length required")
+                return
+
+            body = io.BufferedReader(LimitedReader(self.rfile, int(length)))
+            chunks = iter_chunks(body, chunk_rows, fmt='csv')
+            try:
+                first = next(chunks)
+            except StopIteration:
+                self.send_error(400, "Empty CSV body")
+                return
+            except Exception as e:
+                self.send_error(400, f"Could not parse CSV: {e}")
+                return
+            # Score the first chunk before any headers go out, so bad input still gets a 400
+            try:
+                first_scored = predict_chunk(bundle, first, proba=proba)
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
+            except Exception as e:
+                self.send_error(500, f"Scoring failed: {e}")
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/csv')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            stream = ChunkedWriter(self.wfile)
+            buffered = io.BufferedWriter(stream)
+            try:
+                with PredictionWriter(buffered, fmt='csv') as writer:
+                    writer.write(first_scored)
+                    stats = score_chunks(bundle, chunks, writer, proba=proba)
+                buffered.flush()
+            except Exception as e:
+                # Headers are gone: drop the connection without the final chunk so the client sees an error
+                self.log_error("scoring failed mid-stream: %s", e)
+                self.close_connection = True
+                return
+            stream.finish()
+            self.log_message(
+                "scored %d rows in %.2f s (%.0f rows/s)",
+                stats['rows'] + len(first), stats['seconds'], stats['rows_per_second']
+            )
+
+    return PredictionHandler
+
+
+def serve(args):
+    bundle = load_model(args.model)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(bundle, args.chunk_rows, not args.no_proba))
+    print(f"Serving {args.model} on http://{args.host}:{args.port} (POST /predict, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_train = sub.add_parser('train', help="Fit a pipeline on the Iris dataset and save it")
+    p_train.add_argument('--model', choices=['knn', 'svm'], default='knn')
+    p_train.add_argument('--n-neighbors', type=int, default=5)
+    p_train.add_argument('--knn-backend', choices=list(KNN_BACKENDS.values()), default='auto',
+                         help="Neighbour search for the KNN pipeline")
+    p_train.add_argument('--svm-c', type=float, default=1.0)
+    p_train.add_argument('--svm-engine', choices=list(SVM_ENGINES.values()), default='svc')
+    p_train.add_argument('--train-file', help="Labelled CSV/Parquet file to stream through the 'sgd' SVM engine "
+                                              "instead of training on the built-in dataset")
+    p_train.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    p_train.add_argument('--epochs', type=int, default=3, help="Passes over --train-file")
+    p_train.add_argument('--random-state', type=int, default=42)
+    p_train.add_argument('--output', required=True, help="Where to save the model (.joblib)")
+    p_train.set_defaults(func=train)
+
+    p_update = sub.add_parser('update', help="Update the online models with newly labelled rows")
+    p_update.add_argument('--input', required=True, help="Labelled CSV/Parquet file of new measurements")
+    p_update.add_argument('--state', default='models/online.joblib', help="Online models to update (created if missing)")
+    p_update.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per update")
+    p_update.add_argument('--n-neighbors', type=int, default=5, help="Only used when creating new models")
+    p_update.add_argument('--svm-c', type=float, default=1.0, help="Only used when creating new models")
+    p_update.add_argument('--random-state', type=int, default=42, help="Only used when creating new models")
+    p_update.add_argument('--export-knn', help="Also save the KNN as a pipeline for predict/serve")
+    p_update.add_argument('--export-svm', help="Also save the SVM as a pipeline for predict/serve")
+    p_update.set_defaults(func=update)
+
+    for name, func, help_text in [
+        ('predict', predict, "Score a CSV/Parquet file in chunks"),
+        ('serve', serve, "Serve predictions over HTTP"),
+    ]:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--model', required=True, help="Path to a saved model")
+        p.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+        p.add_argument('--no-proba', action='store_true', help="Only write the predicted species")
+        p.set_defaults(func=func)
+        if name == 'predict':
+            p.add_argument('--input', required=True)
+            p.add_argument('--output', required=True)
+        else:
+            p.add_argument('--host', default='127.0.0.1')
+            p.add_argument('--port', type=int, default=8502)
+
+    args = parser.parse_args(argv)
+    if getattr(args, 'train_file', None) and (args.model != 'svm' or args.svm_engine != 'sgd'):
+        parser.error("--train-file needs --model svm --svm-engine sgd")
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
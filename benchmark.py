@@ -0,0 +1,246 @@
+"""Headless benchmarks of each page's core logic on synthetic Iris data of growing size.
+
+Every benchmark is timed `--repeat` times per dataset size, then run once
+more under tracemalloc for its peak memory (Python and NumPy allocations;
+memory held inside DuckDB or libsvm is not traced). Results are written as
+JSON so runs can be compared.
+
+Examples:
+    python benchmark.py --output bench/baseline.json
+    python benchmark.py --sizes 150 1000000 10000000 --only loaders,eda,sql
+    python benchmark.py --output bench/new.json --compare bench/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from utils.aggregates import compute_aggregates
+from utils.data import FEATURE_COLUMNS, FileDataset, IrisDataset, get_dataset, open_dataset
+from utils.model_cache import DEFAULT_MODEL_PARAMS, build_pipelines
+from utils.neighbors import synthetic_like
+from utils.reports import create_classification_pdf, create_eda_pdf, create_home_pdf, create_sql_pdf
+from utils.sql import EXAMPLE_PARAMS, EXAMPLE_QUERIES, PAGE_SIZE, ConnectionPool, QueryCache, parse_params, run_query
+
+DEFAULT_SIZES = [150, 10_000, 1_000_000]
+GROUPS = ['loaders', 'eda', 'models', 'sql', 'pdf']
+# Exact SVC training grows quadratically or worse, so it is skipped above this size
+SVM_MAX_ROWS = 20_000
+# Predictions are timed on at most this many rows
+PREDICT_ROWS = 10_000
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float('nan')
+
+
+def run_benchmark(name, rows, fn, repeat):
+    """Times fn() repeat times, then once more under tracemalloc for its peak memory."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'benchmark': name,
+        'rows': rows,
+        'repeat': repeat,
+        'times_s': times,
+        'p50_ms': percentile(times, 50) * 1000,
+        'p95_ms': percentile(times, 95) * 1000,
+        'p99_ms': percentile(times, 99) * 1000,
+        'mean_ms': float(np.mean(times)) * 1000,
+        'peak_mb': peak / 1024 / 1024,
+    }
+
+
+def synthetic_dataset(rows, seed=0):
+    """An Iris-shaped in-memory dataset with `rows` rows, resampled from the real data with jitter."""
+    base = get_dataset()
+    X, y = synthetic_like(*base.to_numpy(), rows, seed=seed)
+    return IrisDataset(X, y, base.categories)
+
+
+def write_files(dataset, directory):
+    """Writes the dataset as Parquet and CSV for the file-loader benchmarks."""
+    df = dataset.to_pandas()
+    paths = {'parquet': os.path.join(directory, 'iris.parquet'), 'csv': os.path.join(directory, 'iris.csv')}
+    df.to_parquet(paths['parquet'], index=False)
+    df.to_csv(paths['csv'], index=False)
+    return paths
+
+
+def loader_benchmarks(dataset, paths):
+    X, y = dataset.to_numpy()
+
+    def fresh(fn):
+        # Build a new dataset each time so the cached pandas/Arrow views are measured too
+        return lambda: fn(IrisDataset(X, y, dataset.categories))
+
+    def open_file(path):
+        # open_dataset caches per file, so bypass it to time a cold open
+        return lambda: FileDataset(path)
+
+    return {
+        'loaders.in_memory': lambda: IrisDataset(X, y, dataset.categories),
+        'loaders.to_pandas': fresh(lambda d: d.to_pandas()),
+        'loaders.to_arrow': fresh(lambda d: d.to_arrow()),
+        'loaders.open_parquet': open_file(paths['parquet']),
+        'loaders.open_csv': open_file(paths['csv']),
+    }
+
+
+def eda_benchmarks(dataset, paths):
+    benchmarks = {
+        'eda.aggregates_numpy': lambda: compute_aggregates(dataset),
+        'eda.pandas_describe_corr': lambda: (
+            dataset.to_pandas().describe(), dataset.to_pandas()[FEATURE_COLUMNS].corr()
+        ),
+    }
+    file_dataset = open_dataset(paths['parquet'])
+    benchmarks['eda.aggregates_duckdb_parquet'] = lambda: compute_aggregates(file_dataset)
+    return benchmarks
+
+
+def model_benchmarks(dataset, rows):
+    X, y = dataset.to_numpy()
+    X_query = X[:PREDICT_ROWS]
+    params = {k: v for k, v in DEFAULT_MODEL_PARAMS.items() if k != 'test_size'}
+    benchmarks = {}
+    for name in ('knn', 'svm'):
+        if name == 'svm' and rows > SVM_MAX_ROWS:
+            continue
+        pipeline = build_pipelines(**params, n_samples=len(X))[name]
+        fitted = build_pipelines(**params, n_samples=len(X))[name].fit(X, y)
+        benchmarks[f'models.{name}_fit'] = lambda pipeline=pipeline: pipeline.fit(X, y)
+        benchmarks[f'models.{name}_predict'] = lambda fitted=fitted: fitted.predict(X_query)
+    return benchmarks
+
+
+def sql_benchmarks(dataset):
+    pool = ConnectionPool(dataset)
+    # A zero budget means nothing is cached, so every call runs the query
+    no_cache = QueryCache(max_mb=0)
+    benchmarks = {}
+    for label, query in EXAMPLE_QUERIES.items():
+        params = parse_params(EXAMPLE_PARAMS.get(label, ""))
+        slug = label.split(' (')[0].lower().replace(' ', '_')
+        benchmarks[f'sql.{slug}'] = lambda query=query, params=params: run_query(
+            pool, no_cache, dataset.version, query, params
+        )
+    return benchmarks
+
+
+def pdf_benchmarks(dataset, first_size):
+    aggregates = compute_aggregates(dataset)
+    page = dataset.head(PAGE_SIZE)
+    benchmarks = {
+        'pdf.eda': lambda: create_eda_pdf(aggregates['describe']),
+        'pdf.sql_page': lambda: create_sql_pdf(EXAMPLE_QUERIES["View all data"], page),
+        # The whole frame: the report renders at most REPORT_MAX_ROWS rows and summarises the rest
+        'pdf.sql_full_result': lambda: create_sql_pdf("SELECT * FROM iris_table", dataset.to_pandas()),
+    }
+    if first_size:
+        # These reports do not depend on the data size
+        report = "precision recall f1-score support\n" * 8
+        benchmarks['pdf.home'] = lambda: create_home_pdf("intro " * 50, "details " * 50, "anatomy " * 50)
+        benchmarks['pdf.classification'] = lambda: create_classification_pdf(DEFAULT_MODEL_PARAMS, report, report)
+    return benchmarks
+
+
+def run(sizes, groups, repeat, log=print):
+    results = []
+    for i, rows in enumerate(sizes):
+        dataset = synthetic_dataset(rows)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            benchmarks = {}
+            paths = write_files(dataset, tmp_dir) if {'loaders', 'eda'} & set(groups) else None
+            if 'loaders' in groups:
+                benchmarks.update(loader_benchmarks(dataset, paths))
+            if 'eda' in groups:
+                benchmarks.update(eda_benchmarks(dataset, paths))
+            if 'models' in groups:
+                benchmarks.update(model_benchmarks(dataset, rows))
+            if 'sql' in groups:
+                benchmarks.update(sql_benchmarks(dataset))
+            if 'pdf' in groups:
+                benchmarks.update(pdf_benchmarks(dataset, first_size=i == 0))
+
+            for name, fn in benchmarks.items():
+                result = run_benchmark(name, rows, fn, repeat)
+                results.append(result)
+                log(f"{name:<40} {rows:>12,} rows  p50 {result['p50_ms']:>10,.2f} ms  "
+                    f"p95 {result['p95_ms']:>10,.2f} ms  peak {result['peak_mb']:>8,.1f} MB")
+    return results
+
+
+def environment():
+    import duckdb
+    import pandas
+    import sklearn
+
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pandas.__version__,
+        'sklearn': sklearn.__version__,
+        'duckdb': duckdb.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results, baseline_path, log=print):
+    """Prints the p50 change of every benchmark also present in a baseline run."""
+    with open(baseline_path) as f:
+        baseline = {(r['benchmark'], r['rows']): r for r in json.load(f)['results']}
+    log(f"\nCompared with {baseline_path} (p50, >1.00x is slower):")
+    for result in results:
+        old = baseline.get((result['benchmark'], result['rows']))
+        if old is None or not old['p50_ms']:
+            continue
+        ratio = result['p50_ms'] / old['p50_ms']
+        flag = "  <-- slower" if ratio > 1.2 else ""
+        log(f"{result['benchmark']:<40} {result['rows']:>12,} rows  "
+            f"{old['p50_ms']:>10,.2f} -> {result['p50_ms']:>10,.2f} ms  {ratio:5.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Dataset sizes in rows")
+    parser.add_argument('--only', default=','.join(GROUPS), help=f"Comma-separated groups: {', '.join(GROUPS)}")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per benchmark and size")
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    parser.add_argument('--compare', help="Baseline JSON from an earlier run")
+    args = parser.parse_args(argv)
+
+    groups = [g.strip() for g in args.only.split(',') if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"Unknown groups: {', '.join(sorted(unknown))}")
+
+    results = run(args.sizes, groups, args.repeat)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'sizes': args.sizes, 'results': results}, f, indent=2)
+        print(f"Wrote {len(results)} results to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
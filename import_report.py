@@ -0,0 +1,77 @@
+"""Import-time breakdown for the app's entry points, to track cold-start regressions.
+
+Each page's top-level imports are replayed in a fresh interpreter under
+`python -X importtime`, and the timings are grouped by top-level package.
+
+Examples:
+    python import_report.py
+    python import_report.py pages/3_Classification.py --top 15
+    python import_report.py --json > import_times.json
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+ENTRY_POINTS = ['Home.py', 'pages/2_Basic_EDA.py', 'pages/3_Classification.py', 'pages/4_SQL.py']
+
+
+def top_level_imports(path):
+    """The import statements at module level of a script, as source lines."""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def measure(statements):
+    """Runs the statements under -X importtime; returns [(module, self_us, cumulative_us)]."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', '\n'.join(statements)],
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def breakdown(path):
+    """Total import time of one entry point, plus self time summed per top-level package."""
+    rows = measure(top_level_imports(path))
+    packages = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.split('.')[0]] += self_us
+    return {
+        'entry_point': path,
+        'total_ms': sum(self_us for _, self_us, _ in rows) / 1000,
+        'modules': len(rows),
+        'packages_ms': {
+            name: us / 1000 for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('entry_points', nargs='*', default=ENTRY_POINTS)
+    parser.add_argument('--top', type=int, default=10, help="Packages to list per entry point")
+    parser.add_argument('--json', action='store_true', help="Print the full breakdown as JSON")
+    args = parser.parse_args(argv)
+
+    reports = [breakdown(path) for path in args.entry_points]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    for report in reports:
+        print(f"{report['entry_point']}: {report['total_ms']:,.0f} ms across {report['modules']} modules")
+        for name, ms in list(report['packages_ms'].items())[:args.top]:
+            print(f"    {name:<24} {ms:>9,.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
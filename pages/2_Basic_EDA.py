@@ -1,78 +1,79 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.datasets import load_iris
-import duckdb
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-import plotly.express as px
+
+from utils.aggregates import get_aggregates
+from utils.data import FEATURE_COLUMNS, SPECIES_COLUMN
+from utils.figures import render_figure
+from utils.reports import cached_report, create_eda_pdf, frame_hash
+from utils.scatter import SCATTER_MODES, build_scatter_matrix
+from utils.profiling import span
+from utils.ui import dataset_source_sidebar, debug_sidebar, figure_stats_sidebar, page_setup
 
 # Page Configuration 
-st.set_page_config(
-    page_title="Basic EDA",
-    layout="wide"
-)
+page_setup("Basic EDA", page_title="Basic EDA", layout="wide")
 
 st.title("Basic Exploratory Data Analysis (EDA)")
 
-# 1. Load the Data
-@st.cache_data
-def load_data():
-    """Loads the Iris dataset and returns a Pandas DataFrame with cleaned columns."""
-    iris = load_iris(as_frame=True)
-    df = iris.frame
-    
-    df.columns = [col.replace(' (cm)', '').replace(' ', '_') for col in df.columns]
-    
-    df.rename(columns={'target': 'species_id'}, inplace=True)
-    
-    # Map species ID to species name for EDA
-    df['species'] = df['species_id'].map({
-        0: 'Setosa',
-        1: 'Versicolor',
-        2: 'Virginica'
-    })
-    return df
-
-iris_df = load_data()
+# 1. Load the Data (built-in dataset, or a file scanned through DuckDB)
+with span("load dataset"):
+    dataset = dataset_source_sidebar()
+# Stats, correlations and histogram bins in one pass, cached per dataset version
+with span("aggregates"):
+    aggregates = get_aggregates(dataset)
 
 # 2. Display Data Snapshot
+@st.cache_resource
+def get_snapshot(version, _dataset):
+    """A seeded 8-row sample and the column count, computed once per dataset version.
+
+    A file sample scans the whole file, so it must not run on every rerun;
+    the fixed seed also keeps the preview stable across widget interactions.
+    """
+    return _dataset.sample(8, seed=0), len(_dataset.schema())
+
 st.header("1. Dataset Snapshot")
-st.dataframe(iris_df.sample(8), use_container_width=True)
-st.write(f"Dataset Shape: {iris_df.shape[0]} rows, {iris_df.shape[1]} columns")
+with span("snapshot sample"):
+    snapshot, n_columns = get_snapshot(dataset.version, dataset)
+st.dataframe(snapshot, use_container_width=True)
+st.write(f"Dataset Shape: {dataset.n_rows} rows, {n_columns} columns")
 
 # 3. Display Basic Statistics
 st.header("2. Descriptive Statistics")
-descriptive_stats = iris_df.describe()
+descriptive_stats = aggregates['describe']
 st.dataframe(descriptive_stats, use_container_width=True)
 
 # 4. Simple Visualization (Histogram for a single feature)
 st.header("3. Feature Distribution")
 feature = st.selectbox(
     "Select a feature to visualize:",
-    iris_df.columns[0:4] # Exclude species_id and species name columns
+    FEATURE_COLUMNS
 )
 
-fig, ax = plt.subplots()
-# Create a histogram of the selected feature, colored by species
-sns.histplot(data=iris_df, x=feature, hue='species', kde=True, ax=ax)
-ax.set_title(f'Distribution of {feature}')
-st.pyplot(fig)
+def draw_histogram(fig, ax):
+    import seaborn as sns
+
+    # Draw the histogram from the pre-computed bins, weighting each bin center by its count
+    sns.histplot(data=aggregates['histograms'][feature], x='bin_center', weights='count', hue=SPECIES_COLUMN,
+                 bins=list(aggregates['bin_edges'][feature]), kde=True, ax=ax)  # seaborn needs a list, not an array, here
+    ax.set_xlabel(feature)
+    ax.set_title(f'Distribution of {feature}')
+
+# Figures are rendered once per dataset version and feature, then served as PNG bytes
+st.image(render_figure(("histogram", dataset.version, feature), draw_histogram))
 
 # 5. Correlation Heatmap
 st.header("4. Feature Correlation")
-fig_corr, ax_corr = plt.subplots(figsize=(8, 6))
-correlation_matrix = iris_df.iloc[:, :-2].corr() # Correlate only numeric features
-sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', ax=ax_corr)
-ax_corr.set_title('Correlation Matrix of Iris Features')
-st.pyplot(fig_corr)
+correlation_matrix = aggregates['corr'] # Correlate only numeric features
+
+def draw_correlation(fig, ax):
+    import seaborn as sns
+
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', ax=ax)
+    ax.set_title('Correlation Matrix of Iris Features')
+
+st.image(render_figure(("correlation", dataset.version), draw_correlation, figsize=(8, 6)))
 
 # 6. Scatter Matrix Plot 
-numeric_features = list(iris_df.columns[:4]) 
+numeric_features = list(FEATURE_COLUMNS)
 
 st.header("5. Interactive Feature Pair Plots")
 
@@ -82,56 +83,37 @@ selected_feats = st.multiselect(
     options=numeric_features,
     default=numeric_features
 )
+scatter_mode = st.radio(
+    "Rendering mode:",
+    SCATTER_MODES,
+    horizontal=True,
+    help="Auto sends every point for small datasets and a per-species sample for large ones."
+)
 
 # Use selected features, but default to all 4 if the list is empty
-dims = selected_feats if len(selected_feats) >= 2 else list(iris_df.columns[:4]) 
-
-fig_scatter = px.scatter_matrix(
-    iris_df,
-    dimensions=dims,
-    color="species",
-    title="Interactive Pairwise Relationships",
-    opacity=0.8,
-    height=900
+dims = selected_feats if len(selected_feats) >= 2 else numeric_features
+
+with span("scatter matrix", mode=scatter_mode):
+    fig_scatter, scatter_info = build_scatter_matrix(dataset, dims, scatter_mode, aggregates)
+    st.plotly_chart(fig_scatter, use_container_width=True)
+st.caption(
+    f"Mode: {scatter_info['mode']} | Points sent: {scatter_info['points']:,} of {dataset.n_rows:,} | "
+    f"Payload: {scatter_info['payload_bytes'] / 1024:,.1f} KB | Build time: {scatter_info['build_seconds'] * 1000:,.0f} ms"
 )
- 
-fig_scatter.update_traces(diagonal_visible=True, marker=dict(size=6)) 
-fig_scatter.update_layout(
-    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-) 
-st.plotly_chart(fig_scatter, use_container_width=True) 
 
 # --- PDF Report Button ---
 st.markdown("---")
 st.subheader("Generate Report")
 st.info("Download a PDF report of the descriptive statistics.")
 
-def create_eda_pdf(stats_df):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    story.append(Paragraph("Basic EDA Report", styles['h1']))
-    story.append(Paragraph("Descriptive Statistics", styles['h2']))
-    
-    # Convert DataFrame to a string for the PDF
-    try:
-        stats_string = stats_df.to_string()
-    except:
-        stats_string = "Error converting stats to string."
-            
-    story.append(Paragraph(stats_string.replace("\n", "<br/>"), styles['Code']))
-
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
-pdf_buffer = create_eda_pdf(descriptive_stats)
-
 st.download_button(
     label="Download Stats Report (PDF)",
-    data=pdf_buffer,
+    # Built on click and cached by the stats it contains
+    data=lambda: cached_report(("eda", frame_hash(descriptive_stats)), lambda: create_eda_pdf(descriptive_stats)),
     file_name="eda_stats_report.pdf",
     mime="application/pdf",
 )
+
+# --- Figure cache stats (rendered last so they include this run) ---
+figure_stats_sidebar()
+debug_sidebar()
@@ -1,44 +1,155 @@
+import time
+
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-from sklearn.model_selection import train_test_split
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.svm import SVC
-from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from sklearn.datasets import load_iris
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-
-# Load iris dataset
-iris = load_iris(as_frame=True)
-iris_df = iris.frame
-iris_df['species_name'] = iris_df['target'].map(dict(enumerate(iris.target_names)))
-
-X = iris_df.drop(['target', 'species_name'], axis=1)
-y = iris_df['target']
+import numpy as np
+from joblib import effective_n_jobs
+
+from utils.artifacts import ArtifactStore
+from utils.batch import MODEL_DIR, save_model
+from utils.cache import LRUCache
+from utils.data import get_dataset
+from utils.figures import render_figure
+from utils.model_cache import DEFAULT_MODEL_PARAMS, ModelCache, train_models
+from utils.neighbors import KNN_BACKENDS, benchmark_backends, synthetic_like
+from utils.online import OnlineModels, labelled_batch
+from utils.reports import cached_report, create_classification_pdf
+from utils.svm import SVM_ENGINES, benchmark_engines
+from utils.profiling import span
+from utils.ui import (
+    JOB_POLL_SECONDS, debug_sidebar, figure_stats_sidebar, get_job_executor, job_progress, page_setup,
+    session_job
+)
+from utils.sweep import SWEEP_JOBS, SweepCache, run_sweep
+
+page_setup("Classification")
+
+# Shared iris dataset: float32 feature matrix and integer labels
+with span("load dataset"):
+    dataset = get_dataset()
+    X, y = dataset.to_numpy()
+target_names = dataset.categories
+
+@st.cache_resource
+def get_model_cache():
+    """Process-wide LRU cache of trained pipelines, shared by all sessions."""
+    return ModelCache(max_entries=64)
+
+@st.cache_resource
+def get_artifact_store():
+    """On-disk store of fitted models, shared by every worker process."""
+    return ArtifactStore()
+
+model_cache = get_model_cache()
+artifact_store = get_artifact_store()
 
 st.title("Model Comparison and Evaluation")
 st.markdown("We will compare two common classification algorithms: *K-Nearest Neighbors (KNN)* and *Support Vector Machine (SVM). **Note:* Since KNN and SVM are sensitive to feature scales, we use a StandardScaler within a Pipeline for best practice.")
 
 # Sidebar for Model Tuning
 st.sidebar.header("Model Parameters")
-test_size = st.sidebar.slider("Test Set Size Ratio", 0.1, 0.5, 0.3, 0.05)
-random_state = st.sidebar.slider("Random State (Seed)", 0, 100, 42)
+test_size = st.sidebar.slider("Test Set Size Ratio", 0.1, 0.5, DEFAULT_MODEL_PARAMS["test_size"], 0.05)
+random_state = st.sidebar.slider("Random State (Seed)", 0, 100, DEFAULT_MODEL_PARAMS["random_state"])
 st.sidebar.subheader("KNN Settings")
-n_neighbors = st.sidebar.slider("Number of Neighbors (k)", 1, 20, 5)
+n_neighbors = st.sidebar.slider("Number of Neighbors (k)", 1, 20, DEFAULT_MODEL_PARAMS["n_neighbors"])
+knn_backend = KNN_BACKENDS[st.sidebar.selectbox("Neighbour Search", list(KNN_BACKENDS))]
+leaf_size, n_probe = DEFAULT_MODEL_PARAMS["leaf_size"], DEFAULT_MODEL_PARAMS["n_probe"]
+if knn_backend in ('auto', 'kd_tree', 'ball_tree'):
+    leaf_size = st.sidebar.slider("Tree Leaf Size", 5, 100, leaf_size, 5)
+elif knn_backend == 'ivf':
+    n_probe = st.sidebar.slider("IVF Cells Probed", 1, 32, n_probe)
 st.sidebar.subheader("SVM Settings")
-svm_c = st.sidebar.slider("SVM Regularization (C)", 0.1, 10.0, 1.0, 0.1)
+svm_c = st.sidebar.slider("SVM Regularization (C)", 0.1, 10.0, DEFAULT_MODEL_PARAMS["svm_c"], 0.1)
+svm_engine = SVM_ENGINES[st.sidebar.selectbox("SVM Engine", list(SVM_ENGINES))]
+SVM_ENGINE_LABELS = {engine: label for label, engine in SVM_ENGINES.items()}
+
+# Reuse both models for the current parameter set: from memory, then from disk, else train.
+# Loading and training run as a background job; while it runs the page keeps
+# showing the last models that finished, and moving a slider again cancels it.
+knn_options = (knn_backend, leaf_size, n_probe)
+cache_key = (test_size, random_state, n_neighbors, svm_c, knn_options, svm_engine, dataset.version)
+model_params = {
+    "test_size": test_size, "random_state": random_state, "n_neighbors": n_neighbors,
+    "svm_c": svm_c, "knn_backend": knn_backend, "leaf_size": leaf_size, "n_probe": n_probe,
+    "svm_engine": svm_engine, "data_version": dataset.version,
+}
+job_executor = get_job_executor()
+model_job = session_job("models")
+
+def load_or_train_models(job, key=cache_key, params=model_params):
+    with span("train or load artifact"):
+        entry, info = artifact_store.load_or_train(
+            params,
+            lambda: train_models(
+                X, y, target_names, params["test_size"], params["random_state"], params["n_neighbors"],
+                params["svm_c"], params["knn_backend"], params["leaf_size"], params["n_probe"], params["svm_engine"],
+                progress=job.report
+            ),
+            save_if=lambda entry: entry['knn']['error'] is None and entry['svm']['error'] is None
+        )
+    model_cache.put(key, entry)
+    return entry, info, params
+
+with span("models (memory, disk or train)"):
+    cached_entry = model_cache.get(cache_key)
+    if cached_entry is not None:
+        model_job.set_result(job_executor, cache_key, (cached_entry, {'source': 'memory'}, model_params))
+    else:
+        job = model_job.request(job_executor, cache_key, load_or_train_models, label="Training models")
+        if job is not None and model_job.result is None:
+            # Nothing to show yet, so the first visit waits for its models
+            first_progress = st.progress(0.0, text="Loading or training models...")
+            while not job.wait(JOB_POLL_SECONDS):
+                first_progress.progress(job.progress, text=f"Loading or training models: {job.message or job.state}")
+            first_progress.empty()
+        model_job.poll(job_executor, wait=0.2)
+
+if model_job.result is None:
+    st.error(f"Could not load or train the models: {model_job.error}")
+    st.stop()
+results, model_source, shown_params = model_job.result
+
+cache_stats = model_cache.stats()
+st.sidebar.subheader("Model Cache")
+st.sidebar.caption(
+    f"Hits: {cache_stats['hits']} | Misses: {cache_stats['misses']} | "
+    f"Entries: {cache_stats['entries']}/{cache_stats['max_entries']}"
+)
+if model_source['source'] == 'memory':
+    st.sidebar.caption("Models served from the in-memory cache.")
+elif model_source['source'] == 'disk':
+    st.sidebar.caption(
+        f"Models loaded from artifact v{model_source['version']} in {model_source['seconds'] * 1000:,.1f} ms (memory-mapped)."
+    )
+elif model_source['version'] is None:
+    st.sidebar.caption(f"Models trained in {model_source['seconds'] * 1000:,.1f} ms (not saved to disk).")
+else:
+    st.sidebar.caption(f"Models trained in {model_source['seconds'] * 1000:,.1f} ms and saved as artifact v{model_source['version']}.")
+
+if model_job.running:
+    st.info("Showing the last models that finished training; the results below update when the new ones are ready.")
+    job_progress(model_job, "Training models")
+elif model_job.error_key == cache_key:
+    st.error(f"Training with these parameters failed: {model_job.error}. Showing the last models that finished.")
 
 # Split Data
 st.subheader("Data Split")
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
-st.info(f"Training set size: {len(X_train)} samples | Test set size: {len(X_test)} samples")
+st.info(f"Training set size: {results['n_train']} samples | Test set size: {results['n_test']} samples")
+
+
+def confusion_matrix_png(matrix, cmap):
+    """Confusion matrix heatmap, rendered once per distinct matrix."""
+    def draw(fig, ax):
+        import seaborn as sns
+
+        sns.heatmap(matrix, annot=True, fmt='d', cmap=cmap,
+                    xticklabels=target_names,
+                    yticklabels=target_names, ax=ax)
+        ax.set_ylabel('True Species')
+        ax.set_xlabel('Predicted Species')
+
+    key = ("confusion_matrix", matrix.tobytes(), matrix.shape, cmap, tuple(target_names))
+    return render_figure(key, draw, figsize=(6, 5))
 
 
 # --- Training and Evaluation ---
@@ -52,66 +163,41 @@ acc_knn = 0.0
 acc_svm = 0.0
 
 # 1. K-Nearest Neighbors (KNN)
-with col_knn:
+with col_knn, span("KNN block"):
     st.subheader("K-Nearest Neighbors (KNN) with Scaling Pipeline")
-    try:
-        knn_pipe = Pipeline([
-            ('scaler', StandardScaler()),
-            ('knn', KNeighborsClassifier(n_neighbors=n_neighbors))
-        ])
-        knn_pipe.fit(X_train, y_train)
-        y_pred_knn = knn_pipe.predict(X_test)
-        
-        acc_knn = accuracy_score(y_test, y_pred_knn)
+    knn_result = results['knn']
+    if knn_result['error'] is None:
+        acc_knn = knn_result['accuracy']
         st.metric(label="Accuracy Score", value=f"{acc_knn:.4f}")
         
         st.markdown("#### Confusion Matrix")
-        cm_knn = confusion_matrix(y_test, y_pred_knn)
-        fig_knn, ax_knn = plt.subplots(figsize=(6, 5))
-        sns.heatmap(cm_knn, annot=True, fmt='d', cmap='Blues', 
-                    xticklabels=iris_df['species_name'].unique(), 
-                    yticklabels=iris_df['species_name'].unique(), ax=ax_knn)
-        ax_knn.set_ylabel('True Species')
-        ax_knn.set_xlabel('Predicted Species')
-        st.pyplot(fig_knn)
+        st.image(confusion_matrix_png(knn_result['confusion_matrix'], 'Blues'))
         
         st.markdown("#### Classification Report")
-        report_knn = classification_report(y_test, y_pred_knn, target_names=iris_df['species_name'].unique(), output_dict=False)
+        report_knn = knn_result['report']
         st.text(report_knn)
-    except Exception as e:
-        st.error(f"Error running KNN model: {e}")
-        report_knn = f"Error running KNN model: {e}"
+    else:
+        st.error(f"Error running KNN model: {knn_result['error']}")
+        report_knn = f"Error running KNN model: {knn_result['error']}"
 
 # 2. Support Vector Machine (SVM)
-with col_svm:
+with col_svm, span("SVM block"):
     st.subheader("Support Vector Machine (SVM) with Scaling Pipeline")
-    try:
-        svm_pipe = Pipeline([
-            ('scaler', StandardScaler()),
-            ('svm', SVC(C=svm_c, random_state=random_state))
-        ])
-        svm_pipe.fit(X_train, y_train)
-        y_pred_svm = svm_pipe.predict(X_test)
-        
-        acc_svm = accuracy_score(y_test, y_pred_svm)
+    st.caption(f"Engine: {SVM_ENGINE_LABELS[shown_params['svm_engine']]}")
+    svm_result = results['svm']
+    if svm_result['error'] is None:
+        acc_svm = svm_result['accuracy']
         st.metric(label="Accuracy Score", value=f"{acc_svm:.4f}")
         
         st.markdown("#### Confusion Matrix")
-        cm_svm = confusion_matrix(y_test, y_pred_svm)
-        fig_svm, ax_svm = plt.subplots(figsize=(6, 5))
-        sns.heatmap(cm_svm, annot=True, fmt='d', cmap='Reds', 
-                    xticklabels=iris_df['species_name'].unique(), 
-                    yticklabels=iris_df['species_name'].unique(), ax=ax_svm)
-        ax_svm.set_ylabel('True Species')
-        ax_svm.set_xlabel('Predicted Species')
-        st.pyplot(fig_svm)
+        st.image(confusion_matrix_png(svm_result['confusion_matrix'], 'Reds'))
         
         st.markdown("#### Classification Report")
-        report_svm = classification_report(y_test, y_pred_svm, target_names=iris_df['species_name'].unique(), output_dict=False)
+        report_svm = svm_result['report']
         st.text(report_svm)
-    except Exception as e:
-        st.error(f"Error running SVM model: {e}")
-        report_svm = f"Error running SVM model: {e}"
+    else:
+        st.error(f"Error running SVM model: {svm_result['error']}")
+        report_svm = f"Error running SVM model: {svm_result['error']}"
 
 st.header("Conclusion")
 st.markdown("Even with proper scaling, this dataset is often perfectly separable, leading to very high or 100% accuracy. Try adjusting the Test Set Size Ratio or the Random State (Seed) in the sidebar to observe how the model performance might fluctuate with different data splits.")
@@ -123,52 +209,286 @@ elif acc_svm > acc_knn:
 else:
     st.info(f"Both models achieved the same accuracy ({acc_knn:.4f}).")
 
+# --- Hyperparameter Sweep ---
+st.markdown("---")
+st.header("Hyperparameter Sweep (Cross-Validation)")
+st.markdown("Instead of one train/test split, score every k and C on stratified k-fold cross-validation, repeated over several seeds. Folds run in parallel across CPU cores and each grid cell is cached, so re-running a sweep only fits the new cells.")
+
+col_grid_knn, col_grid_svm, col_grid_cv = st.columns(3)
+with col_grid_knn:
+    k_range = st.slider("k range", 1, 30, (1, 15))
+    k_values = list(range(k_range[0], k_range[1] + 1))
+with col_grid_svm:
+    c_values = st.multiselect("C values", [0.01, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 50.0, 100.0],
+                              default=[0.1, 0.5, 1.0, 5.0, 10.0])
+with col_grid_cv:
+    n_folds = st.slider("Folds", 2, 10, 5)
+    n_seeds = st.slider("Seeds", 1, 10, 3)
+sweep_seeds = list(range(random_state, random_state + n_seeds))
+sweep_config = (tuple(k_values), tuple(sorted(c_values)), tuple(sweep_seeds), n_folds, dataset.version)
+
+@st.cache_resource
+def get_sweep_cache():
+    """Process-wide cache of cross-validated grid cells, shared by all sessions."""
+    return SweepCache(max_entries=10_000)
+
+sweep_cache = get_sweep_cache()
+
+def draw_sweep(cells, container):
+    """Heatmaps of mean CV accuracy per (seed, value) and mean ± std bands across seeds."""
+    if not cells:
+        return
+    frame = pd.DataFrame(cells)
+    with container.container():
+        cols = st.columns(2)
+        for col, model, label, cmap in [(cols[0], 'knn', 'k (neighbors)', 'Blues'), (cols[1], 'svm', 'C', 'Reds')]:
+            model_frame = frame[frame['model'] == model]
+            if model_frame.empty:
+                continue
+            with col:
+                grid = model_frame.pivot(index='seed', columns='value', values='mean').sort_index(axis=1)
+                # Spread over every fold of every seed
+                band = model_frame.groupby('value')['scores'].apply(lambda s: np.concatenate(s.to_list()))
+                means = band.apply(np.mean)
+                stds = band.apply(np.std)
+
+                def draw(fig, axes, grid=grid, means=means, stds=stds, model=model, label=label, cmap=cmap):
+                    # Plotting libraries are only imported once there is a sweep to draw
+                    import seaborn as sns
+
+                    ax_map, ax_band = axes
+                    sns.heatmap(grid, annot=True, fmt='.3f', cmap=cmap, cbar=False, ax=ax_map, annot_kws={'size': 7})
+                    ax_map.set_title(f"{model.upper()}: mean CV accuracy")
+                    ax_map.set_xlabel(label)
+                    ax_map.set_ylabel('Seed')
+                    ax_band.plot(means.index, means.values, marker='o')
+                    ax_band.fill_between(means.index, means - stds, means + stds, alpha=0.25)
+                    if model == 'svm':
+                        ax_band.set_xscale('log')
+                    ax_band.set_xlabel(label)
+                    ax_band.set_ylabel('Accuracy (mean ± std)')
+                    fig.tight_layout()
+
+                # Partial sweeps redraw as cells arrive; each distinct state is rendered once
+                key = ("sweep", model, grid.to_numpy().tobytes(), tuple(grid.index), tuple(grid.columns),
+                       means.to_numpy().tobytes(), stds.to_numpy().tobytes())
+                st.image(render_figure(key, draw, nrows=2, ncols=1, figsize=(7, 7)))
+
+                best = means.idxmax()
+                st.caption(f"Best {label}: {best} (accuracy {means[best]:.4f} ± {stds[best]:.4f})")
+
+sweep_output = st.empty()
+if st.button("Run sweep", disabled=not k_values and not c_values):
+    progress = st.progress(0.0, text="Starting sweep...")
+    n_cells = (len(k_values) + len(c_values)) * len(sweep_seeds)
+    done = []
+    last_draw = [0.0]
+
+    def on_cell(cell):
+        done.append(cell)
+        progress.progress(len(done) / n_cells, text=f"{len(done)}/{n_cells} grid cells scored")
+        # Redraw at most twice a second while folds stream in
+        if time.perf_counter() - last_draw[0] > 0.5:
+            draw_sweep(done, sweep_output)
+            last_draw[0] = time.perf_counter()
+
+    with span("hyperparameter sweep"):
+        _, sweep_info = run_sweep(
+            X, y, dataset.version, k_values, sorted(c_values), sweep_seeds, n_folds=n_folds, cache=sweep_cache, on_cell=on_cell
+        )
+    progress.empty()
+    st.session_state['sweep_config'] = sweep_config
+    st.session_state['sweep_info'] = sweep_info
+
+if st.session_state.get('sweep_config') == sweep_config:
+    # Every cell of the last sweep is cached, so redrawing it costs no fits
+    with span("draw sweep"):
+        cells, _ = run_sweep(X, y, dataset.version, k_values, sorted(c_values), sweep_seeds, n_folds=n_folds, cache=sweep_cache)
+        draw_sweep(cells, sweep_output)
+    sweep_info = st.session_state['sweep_info']
+    st.caption(
+        f"{sweep_info['cells']} grid cells ({sweep_info['cached_cells']} cached), {sweep_info['fits']} fits "
+        f"in {sweep_info['seconds']:.2f} s on {effective_n_jobs(SWEEP_JOBS)} worker(s)."
+    )
+
+# --- Neighbour Search Backends ---
+st.markdown("---")
+st.header("Neighbour Search Backends")
+st.markdown("KNN spends its time finding neighbours at prediction time. Compare the search backends on a synthetic training set resampled from the data with jitter: exact trees, brute force in BLAS blocks, and an approximate IVF index that only scans the cells nearest each query.")
+
+col_bench_rows, col_bench_queries = st.columns(2)
+with col_bench_rows:
+    bench_rows = st.select_slider("Training rows", [len(X), 10_000, 100_000, 1_000_000], value=100_000)
+with col_bench_queries:
+    bench_queries = st.select_slider("Query rows", [100, 1_000, 10_000], value=1_000)
+
+if st.button("Benchmark backends"):
+    with st.spinner("Building indexes and running queries..."), span("KNN backend benchmark"):
+        from sklearn.preprocessing import StandardScaler
+
+        X_bench, y_bench = synthetic_like(X, y, bench_rows + bench_queries, seed=random_state)
+        scaler = StandardScaler().fit(X_bench[:bench_rows])
+        X_bench = scaler.transform(X_bench)
+        st.session_state['knn_benchmark'] = benchmark_backends(
+            X_bench[:bench_rows], y_bench[:bench_rows], X_bench[bench_rows:], y_bench[bench_rows:],
+            KNN_BACKENDS, n_neighbors=n_neighbors, leaf_size=leaf_size, n_probe=n_probe
+        )
+        st.session_state['knn_benchmark_shape'] = (bench_rows, bench_queries, n_neighbors)
+
+if 'knn_benchmark' in st.session_state:
+    rows, queries, k = st.session_state['knn_benchmark_shape']
+    st.dataframe(
+        st.session_state['knn_benchmark'].style.format({
+            'Build (ms)': '{:,.1f}', 'Queries/s': '{:,.0f}', f'Recall@{k}': '{:.3f}', 'Accuracy': '{:.4f}',
+        }),
+        use_container_width=True, hide_index=True
+    )
+    st.caption(f"{rows:,} training rows, {queries:,} queries, k={k}. Recall is measured against exact brute-force neighbours.")
+
+# --- SVM Engines ---
+st.markdown("---")
+st.header("SVM Engines at Scale")
+st.markdown("Exact kernel SVMs train in roughly quadratic to cubic time in the number of rows. Compare them with linear and approximate-kernel engines on a jittered resample of the data; the streaming engine trains with `partial_fit` one chunk at a time, so it also works on files larger than memory (see `batch_predict.py train --train-file`).")
+
+svm_bench_rows = st.select_slider("Training rows ", [len(X), 10_000, 50_000, 200_000, 1_000_000], value=10_000)
+if st.button("Benchmark SVM engines"):
+    with st.spinner("Training SVM engines..."), span("SVM engine benchmark"):
+        X_bench, y_bench = synthetic_like(X, y, svm_bench_rows + 10_000, noise=0.5, seed=random_state)
+        st.session_state['svm_benchmark'] = benchmark_engines(
+            X_bench[:svm_bench_rows], y_bench[:svm_bench_rows], X_bench[svm_bench_rows:], y_bench[svm_bench_rows:],
+            SVM_ENGINES, svm_c=svm_c, random_state=random_state
+        )
+        st.session_state['svm_benchmark_rows'] = svm_bench_rows
+
+if 'svm_benchmark' in st.session_state:
+    st.dataframe(
+        st.session_state['svm_benchmark'].style.format(
+            {'Train (s)': '{:,.3f}', 'Peak memory (MB)': '{:,.1f}', 'Accuracy': '{:.4f}'}, na_rep='—'
+        ),
+        use_container_width=True, hide_index=True
+    )
+    st.caption(
+        f"{st.session_state['svm_benchmark_rows']:,} training rows, 10,000 test rows. "
+        "Peak memory counts Python and NumPy allocations traced during training."
+    )
+
+# --- Online Updates ---
+st.markdown("---")
+st.header("Online Updates")
+st.markdown("When new labelled measurements arrive, these models learn from them without a full refit: the scaler updates its running mean and variance, KNN appends the rows to its reference set, and the streaming SVM takes a `partial_fit` step. An update costs time in proportion to the new rows, not to everything seen so far. The models are shared by all sessions and use the default k and C.")
+
+@st.cache_resource
+def get_online_models(version, _dataset):
+    """Online models for a dataset: the latest saved snapshot, or new ones bootstrapped on the data."""
+    key = ArtifactStore.key_for({"kind": "online", **{k: DEFAULT_MODEL_PARAMS[k] for k in ("n_neighbors", "svm_c", "random_state")},
+                                 "data_version": version})
+    try:
+        # Not memory-mapped: updates write into the stored arrays
+        models, _ = artifact_store.load(key, mmap=False)
+    except Exception:
+        # A corrupt or unreadable snapshot is treated as missing, as in load_or_train
+        models = None
+    if models is None:
+        models = OnlineModels(_dataset.categories, DEFAULT_MODEL_PARAMS["n_neighbors"], DEFAULT_MODEL_PARAMS["svm_c"],
+                              DEFAULT_MODEL_PARAMS["random_state"])
+        models.update(*_dataset.to_numpy(), source="initial dataset")
+    return models, key
+
+online_models, online_key = get_online_models(dataset.version, dataset)
+
+col_online_file, col_online_synthetic = st.columns(2)
+with col_online_file:
+    uploaded = st.file_uploader("Labelled measurements (CSV or Parquet)", type=["csv", "parquet"])
+    if st.button("Learn from file", disabled=uploaded is None):
+        try:
+            new_rows = pd.read_parquet(uploaded) if uploaded.name.endswith(".parquet") else pd.read_csv(uploaded)
+            update = online_models.update(*labelled_batch(new_rows, target_names), source=uploaded.name)
+            st.success(f"Learned {update['rows_added']:,} rows in {update['seconds'] * 1000:,.1f} ms (version {update['version']}).")
+        except Exception as e:
+            st.error(f"Could not learn from {uploaded.name}: {e}")
+with col_online_synthetic:
+    online_batch_rows = st.select_slider("Synthetic batch rows", [10, 100, 1_000, 10_000, 100_000], value=1_000)
+    if st.button("Stream a synthetic batch"):
+        with span("online update"):
+            X_new, y_new = synthetic_like(X, y, online_batch_rows, seed=online_models.version)
+            online_models.update(X_new, y_new, source="synthetic")
+
+@st.cache_resource
+def get_online_scores():
+    """Accuracy of the online models per (artifact key, model version), shared by all sessions."""
+    return LRUCache(max_entries=16)
+
+# Scored once per model version; KNN scoring scans every row learned so far
+online_scores = get_online_scores().get_or_compute(
+    (online_key, online_models.version),
+    lambda: {name: float(np.mean(online_models.predict(name, X) == y)) for name in ("knn", "svm")}
+)
+col_version, col_rows, col_knn_acc, col_svm_acc = st.columns(4)
+col_version.metric("Model version", online_models.version)
+col_rows.metric("Rows learned", f"{online_models.n_rows:,}")
+col_knn_acc.metric("KNN accuracy", f"{online_scores['knn']:.4f}")
+col_svm_acc.metric("SVM accuracy", f"{online_scores['svm']:.4f}")
+st.caption("Accuracy is measured on the built-in Iris data after each update.")
+
+online_history = pd.DataFrame(online_models.history[::-1])
+online_history["ms"] = online_history["seconds"] * 1000
+online_history["rows/s"] = online_history["rows_added"] / online_history["seconds"]
+st.dataframe(
+    online_history[["version", "source", "rows_added", "total_rows", "ms", "rows/s"]].rename(columns={
+        "version": "Version", "source": "Source", "rows_added": "Rows added", "total_rows": "Total rows",
+        "ms": "Update (ms)", "rows/s": "Rows/s",
+    }).style.format({"Update (ms)": "{:,.1f}", "Rows/s": "{:,.0f}", "Rows added": "{:,}", "Total rows": "{:,}"}),
+    use_container_width=True, hide_index=True, height=200
+)
+if st.button("Save snapshot"):
+    snapshot = artifact_store.save(online_key, online_models, meta={
+        "model_version": online_models.version, "rows": online_models.n_rows, "params": online_models.params,
+    })
+    if snapshot is None:
+        st.warning(f"Could not write to {artifact_store.root}; model version {online_models.version} stays in memory only.")
+    else:
+        st.success(f"Saved model version {online_models.version} as artifact v{snapshot}; it is restored when the app restarts.")
+
+# --- Export for Batch Scoring ---
+st.markdown("---")
+st.subheader("Export Models for Batch Scoring")
+st.markdown(f"Save the pipelines above to `{MODEL_DIR}/` and score large files with `python batch_predict.py predict`.")
+col_export_knn, col_export_svm = st.columns(2)
+for col, name, result in [(col_export_knn, "knn", knn_result), (col_export_svm, "svm", svm_result)]:
+    with col:
+        if st.button(f"Save {name.upper()} pipeline", disabled=result['error'] is not None):
+            path = f"{MODEL_DIR}/{name}.joblib"
+            # The parameters of the models on screen, which lag the sidebar while new ones train
+            save_model(path, result['pipeline'], target_names, {
+                "model": name, "test_size": shown_params["test_size"], "random_state": shown_params["random_state"],
+                "n_neighbors": shown_params["n_neighbors"], "svm_c": shown_params["svm_c"],
+                "knn_backend": shown_params["knn_backend"], "svm_engine": shown_params["svm_engine"],
+                "data_version": shown_params["data_version"],
+            })
+            st.success(f"Saved to `{path}`")
+
 # --- PDF Report Button ---
 st.markdown("---")
 st.subheader("Generate Report")
 st.info("Download a PDF report of the model parameters and classification results.")
 
-def create_classification_pdf(params, knn_report, svm_report):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    story.append(Paragraph("Model Classification Report", styles['h1']))
-    story.append(Paragraph("Parameters", styles['h2']))
-    
-    param_text = f"""
-    Test Set Size Ratio: {params['test_size']}<br/>
-    Random State (Seed): {params['random_state']}<br/>
-    KNN - Neighbors (k): {params['n_neighbors']}<br/>
-    SVM - Regularization (C): {params['svm_c']}
-    """
-    story.append(Paragraph(param_text, styles['BodyText']))
-    story.append(Spacer(1, 12))
-    
-    story.append(Paragraph("K-Nearest Neighbors (KNN) Report", styles['h2']))
-    story.append(Paragraph(knn_report.replace("\n", "<br/>").replace(" ", "&nbsp;"), styles['Code']))
-    story.append(Spacer(1, 12))
-
-    story.append(Paragraph("Support Vector Machine (SVM) Report", styles['h2']))
-    story.append(Paragraph(svm_report.replace("\n", "<br/>").replace(" ", "&nbsp;"), styles['Code']))
-
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
 current_params = {
-    "test_size": test_size,
-    "random_state": random_state,
-    "n_neighbors": n_neighbors,
-    "svm_c": svm_c
+    "test_size": shown_params["test_size"],
+    "random_state": shown_params["random_state"],
+    "n_neighbors": shown_params["n_neighbors"],
+    "svm_c": shown_params["svm_c"]
 }
 
-pdf_buffer = create_classification_pdf(current_params, report_knn, report_svm)
+# Same parameters and data always give the same reports, so they key the cache
+report_key = ("classification", model_job.result_key)
 
 st.download_button(
     label="Download Classification Report (PDF)",
-    data=pdf_buffer,
+    data=lambda: cached_report(report_key, lambda: create_classification_pdf(current_params, report_knn, report_svm)),
     file_name="classification_report.pdf",
     mime="application/pdf",
 )
+
+# --- Figure cache stats (rendered last so they include this run) ---
+figure_stats_sidebar()
+debug_sidebar()
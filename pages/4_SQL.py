@@ -1,15 +1,22 @@
 import streamlit as st
 import duckdb
-import pandas as pd
-from sklearn.datasets import load_iris
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
 import re  # For SQL safety check
 
+from utils.sql import (
+    EXAMPLE_PARAMS, EXAMPLE_QUERIES, MAX_RESULT_ROWS, QUERY_TIMEOUT_SECONDS, QueryCache, QueryTimeoutError,
+    get_connection_pool, normalize_sql, parse_params, run_query, strip_literals
+)
+from utils.reports import cached_report, create_sql_pdf, frame_hash
+from utils.profiling import span
+from utils.ui import (
+    dataset_source_sidebar, debug_sidebar, get_job_executor, job_progress, page_setup, session_job
+)
+
+# Rows shown in the dataset viewer; file sources are never loaded in full
+VIEWER_ROWS = 1000
+
 # --- PAGE CONFIGURATION ---
-st.set_page_config(page_title="SQL Playground", layout="wide")
+page_setup("SQL Playground", page_title="SQL Playground", layout="wide")
 st.title("🗃️ SQL Playground")
 
 st.markdown("""
@@ -22,34 +29,30 @@ Here, you can directly query the **Iris dataset** using DuckDB.
 
 # --- DATABASE SETUP ---
 @st.cache_resource
-def get_duckdb_conn():
-    """Initializes and caches the DuckDB connection."""
-    return duckdb.connect(database=':memory:', read_only=False)
-
-@st.cache_data
-def load_data_df():
-    """Loads Iris data and prepares it as a Pandas DataFrame."""
-    iris = load_iris(as_frame=True)
-    df = iris.frame
-    df.columns = [col.replace(' (cm)', '').replace(' ', '_') for col in df.columns]
-    target_names = {0: 'setosa', 1: 'versicolor', 2: 'virginica'}
-    df['species_name'] = df['target'].map(target_names)
-    df.drop(columns=['target'], inplace=True)
-    return df
-
-# Initialize connection and load data
-db_conn = get_duckdb_conn()
-df_iris = load_data_df()
-
-# Register DataFrame with DuckDB
+def get_query_cache():
+    """Process-wide query result cache, keyed by normalized SQL and dataset version."""
+    return QueryCache()
+
+# Initialize the connection pool for the selected dataset
+with span("load dataset"):
+    dataset = dataset_source_sidebar()
 try:
-    db_conn.register('iris_table', df_iris)
-except duckdb.Error:
-    pass  # Skip if already registered
+    with span("connection pool"):
+        db_pool = get_connection_pool(dataset)
+except duckdb.Error as e:
+    st.error(f"Could not register `iris_table` with DuckDB: {e}")
+    st.stop()
+query_cache = get_query_cache()
+job_executor = get_job_executor()
+with span("viewer rows"):
+    df_iris = dataset.head(VIEWER_ROWS)
 
 # --- SECTION 1: DATASET VIEWER ---
 st.header("Full Dataset (`iris_table`)")
-st.markdown("Explore the full Iris dataset below. You can sort and filter, but edits won't be saved.")
+if dataset.n_rows > len(df_iris):
+    st.markdown(f"Showing the first {len(df_iris):,} of {dataset.n_rows:,} rows. Query the table to see the rest.")
+else:
+    st.markdown("Explore the full Iris dataset below. You can sort and filter, but edits won't be saved.")
 st.data_editor(df_iris, use_container_width=True, height=300)
 
 # --- SECTION 2: TWO COLUMN LAYOUT ---
@@ -60,91 +63,143 @@ with col1:
     # Schema Explorer
     st.header("Schema Explorer")
     st.info("Use these column names in your SQL queries.")
-    schema_df = pd.DataFrame({
-        "Column Name": df_iris.columns,
-        "Data Type": [str(dtype) for dtype in df_iris.dtypes]
-    })
+    schema_df = dataset.schema()
     st.dataframe(schema_df, use_container_width=True, hide_index=True)
 
     # Example Queries
     st.header("Example Queries")
-    example_queries = {
-        "View all data": "SELECT * FROM iris_table LIMIT 20;",
-        "Count per species": "SELECT species_name, COUNT(*) AS count FROM iris_table GROUP BY species_name;",
-        "Average petal length by species": "SELECT species_name, AVG(petal_length) AS avg_petal_length FROM iris_table GROUP BY species_name;",
-        "Find largest sepals": "SELECT * FROM iris_table ORDER BY sepal_length DESC, sepal_width DESC LIMIT 5;"
-    }
+    example_queries = EXAMPLE_QUERIES
+    example_params = EXAMPLE_PARAMS
     selected_query = st.selectbox("Select an example query:", options=list(example_queries.keys()))
     default_query = example_queries[selected_query]
+    default_params = example_params.get(selected_query, "")
 
 # --- RIGHT COLUMN: QUERY EXECUTION + RESULTS + REPORT ---
 with col2:
     # SQL Query Box
     st.header("Your SQL Query")
     query = st.text_area("Enter your SQL query:", default_query, height=150)
+    params_text = st.text_input(
+        "Query parameters (comma-separated values for $1, $2, ...):",
+        default_params if query == default_query else "",
+        # Keyed on the query, so editing it or picking another example resets stale parameters
+        key=f"sql_params:{normalize_sql(query)}",
+        help="Parameterized queries are prepared once and reused for every set of values."
+    )
+
+    sql_job = session_job("sql")
+
+    def load_result_page(page):
+        """Starts the last query for one page as a background job; only that page is kept in session state."""
+        sql, params = st.session_state['last_sql_query'], st.session_state['last_sql_params']
+
+        def run(job):
+            with span("run query", page=page):
+                return run_query(db_pool, query_cache, dataset.version, sql, params, page=page, job=job)
+
+        # Typed values, as in run_query's cache key, so 6 and 6.0 are different jobs
+        typed_params = tuple((type(p).__name__, p) for p in params)
+        sql_job.request(job_executor, (dataset.version, sql, typed_params, page), run, label="Running query", rerun=True)
 
     if st.button('Run Query'):
-        query_lower = query.strip().lower()
+        # Keywords inside string literals and comments (e.g. WHERE note = 'set') are not commands
+        query_lower = strip_literals(query).lower()
+        st.session_state['last_sql_query'] = query
 
         # --- SAFETY CHECK ---
-        if re.search(r'\b(update|delete|insert|drop|alter|create|replace|truncate|rename)\b', query_lower):
-            st.error("⚠️ You are trying to change the dataset. You can’t perform this SQL operation.")
-            st.session_state['last_sql_query'] = query
+        if re.search(r'\b(update|delete|insert|drop|alter|create|replace|truncate|rename|prepare|execute|deallocate|attach|detach|set|pragma|copy|export|import|install|load)\b', query_lower):
+            sql_job.cancel(job_executor)
             st.session_state['last_sql_result'] = None
+            st.session_state['last_sql_error'] = "⚠️ You are trying to change the dataset. You can’t perform this SQL operation."
         else:
-            try:
-                result_df = db_conn.execute(query).fetchdf()
-                st.subheader("Query Result")
-                st.dataframe(result_df, use_container_width=True)
-                st.session_state['last_sql_query'] = query
-                st.session_state['last_sql_result'] = result_df
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
-                st.session_state['last_sql_query'] = query
-                st.session_state['last_sql_result'] = None
+            st.session_state['last_sql_params'] = parse_params(params_text)
+            load_result_page(0)
+
+    # Pick up the query once it finishes; the last result stays on screen until then
+    if sql_job.poll(job_executor, wait=0.2):
+        e = sql_job.error
+        if e is None:
+            st.session_state['last_sql_result'], st.session_state['last_sql_info'] = sql_job.result
+            st.session_state['last_sql_result_query'] = sql_job.result_key[1]
+            st.session_state['last_sql_error'] = None
+        elif isinstance(e, QueryTimeoutError):
+            st.session_state['last_sql_result'] = None
+            st.session_state['last_sql_error'] = f"⏱️ {e} Try a LIMIT or a more selective filter."
+        elif isinstance(e, duckdb.OutOfMemoryException):
+            st.session_state['last_sql_result'] = None
+            st.session_state['last_sql_error'] = f"Query exceeded the memory limit ({db_pool.memory_limit}): {e}"
+        else:
+            st.session_state['last_sql_result'] = None
+            st.session_state['last_sql_error'] = f"Error: {str(e)}"
+    if sql_job.running:
+        job_progress(sql_job, "Running query")
+        st.button("Cancel query", on_click=sql_job.cancel, args=(job_executor,))
+
+    if st.session_state.get('last_sql_error'):
+        st.error(st.session_state['last_sql_error'])
+    elif st.session_state.get('last_sql_result') is not None:
+        run_info = st.session_state['last_sql_info']
+        st.subheader("Query Result")
+        if run_info['cached']:
+            st.caption(f"Served from cache (saved {run_info['seconds'] * 1000:,.1f} ms of execution).")
+        else:
+            st.caption(f"Executed in {run_info['seconds'] * 1000:,.1f} ms.")
+        st.dataframe(st.session_state['last_sql_result'], use_container_width=True)
+
+        # Pagination: each move re-runs the query lazily for just that page
+        nav_prev, nav_label, nav_next = st.columns([1, 3, 1])
+        nav_prev.button("◀ Previous", disabled=run_info['page'] == 0,
+                        on_click=load_result_page, args=(run_info['page'] - 1,))
+        nav_label.markdown(f"Rows {run_info['first_row']:,}–{run_info['last_row']:,} (page {run_info['page'] + 1})")
+        nav_next.button("Next ▶", disabled=not run_info['has_more'],
+                        on_click=load_result_page, args=(run_info['page'] + 1,))
+        if run_info['capped']:
+            st.warning(f"Results are capped at {MAX_RESULT_ROWS:,} rows. Add a LIMIT or aggregate to narrow the query.")
 
     # --- PDF REPORT SECTION ---
     st.markdown("---")
     st.subheader("Generate Report")
 
     if 'last_sql_result' in st.session_state and st.session_state['last_sql_result'] is not None:
-        st.info("Click the button to download a PDF report of your last successful query.")
-
-        def create_sql_pdf(query, data_df):
-            buffer = BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            styles = getSampleStyleSheet()
-            story = []
-
-            story.append(Paragraph("SQL Playground Report", styles['h1']))
-            story.append(Paragraph("Query:", styles['h3']))
-            story.append(Paragraph(query.replace("\n", "<br/>"), styles['Code']))
-            story.append(Paragraph("Results:", styles['h3']))
-
-            try:
-                result_string = data_df.to_string()
-            except Exception:
-                result_string = "Error converting results to string."
-
-            story.append(Paragraph(result_string.replace("\n", "<br/>"), styles['Code']))
-            doc.build(story)
-            buffer.seek(0)
-            return buffer
-
-        query_to_report = st.session_state.get('last_sql_query', 'No query run.')
+        st.info("Click the button to download a PDF report of the current page of your last successful query.")
+
+        # The query that produced the rows on screen, not one still running
+        query_to_report = st.session_state.get('last_sql_result_query', 'No query run.')
         result_to_report = st.session_state.get('last_sql_result')
 
         if result_to_report is not None:
-            pdf_buffer = create_sql_pdf(query_to_report, result_to_report)
             st.download_button(
                 label="Download SQL Report (PDF)",
-                data=pdf_buffer,
+                # Built on click and cached by the query and the rows it returned
+                data=lambda: cached_report(
+                    ("sql", query_to_report, frame_hash(result_to_report)),
+                    lambda: create_sql_pdf(query_to_report, result_to_report)
+                ),
                 file_name="sql_playground_report.pdf",
                 mime="application/pdf",
             )
     else:
         st.warning("Run a successful query first to generate a report.")
 
+# --- QUERY CACHE AND POOL STATS ---
+cache_stats = query_cache.stats()
+pool_stats = db_pool.stats()
+st.sidebar.subheader("Query Cache")
+st.sidebar.caption(
+    f"Hit ratio: {cache_stats['hit_ratio']:.0%} ({cache_stats['hits']} hits, {cache_stats['misses']} misses) | "
+    f"Saved: {cache_stats['saved_seconds'] * 1000:,.0f} ms | "
+    f"Memory: {cache_stats['bytes'] / 1024 / 1024:,.2f} of {cache_stats['max_bytes'] / 1024 / 1024:,.0f} MB"
+)
+st.sidebar.subheader("DuckDB Pool")
+st.sidebar.caption(
+    f"Cursors: {pool_stats['cursors']} open, {pool_stats['idle']} idle, max {pool_stats['size']} | "
+    f"Prepared statements: {pool_stats['prepared_statements']} | "
+    f"Threads: {pool_stats['threads']} | Memory limit: {pool_stats['memory_limit']} | "
+    f"Time limit: {QUERY_TIMEOUT_SECONDS:g} s | Killed queries: {pool_stats['killed']}"
+)
+
 # --- FOOTER ---
 st.markdown("---")
 st.caption("💡 Powered by DuckDB, scikit-learn & Streamlit")
+
+debug_sidebar()
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from utils.aggregates import compute_aggregates
+from utils.data import FEATURE_COLUMNS, FileDataset, get_dataset
+from utils.scatter import density_tiles
+
+
+@pytest.fixture(scope='module')
+def datasets(tmp_path_factory):
+    dataset = get_dataset()
+    path = tmp_path_factory.mktemp('data') / 'iris.parquet'
+    dataset.to_pandas().to_parquet(path)
+    return dataset, FileDataset(str(path))
+
+
+def test_numpy_and_duckdb_aggregates_agree(datasets):
+    in_memory, on_disk = (compute_aggregates(d) for d in datasets)
+    np.testing.assert_allclose(in_memory['describe'], on_disk['describe'], rtol=1e-6)
+    np.testing.assert_allclose(in_memory['corr'], on_disk['corr'], rtol=1e-6)
+    for col in FEATURE_COLUMNS:
+        np.testing.assert_array_equal(in_memory['bin_edges'][col], on_disk['bin_edges'][col])
+        np.testing.assert_array_equal(in_memory['histograms'][col]['count'], on_disk['histograms'][col]['count'])
+
+
+def test_numpy_and_duckdb_density_tiles_agree(datasets):
+    in_memory, on_disk = (density_tiles(d, FEATURE_COLUMNS) for d in datasets)
+    assert in_memory.keys() == on_disk.keys()
+    for pair, (x_edges, y_edges, counts) in in_memory.items():
+        disk_x, disk_y, disk_counts = on_disk[pair]
+        np.testing.assert_array_equal(x_edges, disk_x)
+        np.testing.assert_array_equal(y_edges, disk_y)
+        np.testing.assert_array_equal(counts, disk_counts)
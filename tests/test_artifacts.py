@@ -0,0 +1,55 @@
+import os
+import time
+
+import numpy as np
+
+from utils.artifacts import ArtifactStore
+
+
+def test_save_numbers_versions_and_keeps_the_newest(tmp_path):
+    store = ArtifactStore(str(tmp_path), keep_versions=2)
+    assert [store.save('model', np.arange(3) + i) for i in range(4)] == [1, 2, 3, 4]
+    assert store.versions('model') == [3, 4]
+    obj, version = store.load('model')
+    assert version == 4 and obj.tolist() == [3, 4, 5]
+    assert store.meta('model', 4)['sklearn_version']
+
+
+def test_prune_drops_least_recently_used_keys_over_the_size_limit(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_mb=2)
+    # ~0.8 MB each; the sleeps keep the directory timestamps apart
+    for key in ('a', 'b'):
+        store.save(key, np.zeros(100_000))
+        time.sleep(0.05)
+    store.load('a')
+    time.sleep(0.05)
+    store.save('c', np.zeros(100_000))
+    assert sorted(os.listdir(tmp_path)) == ['a', 'c']
+
+
+def test_failed_first_save_returns_none(tmp_path):
+    # The store root is a file, so nothing can be written under it
+    root = tmp_path / 'not-a-directory'
+    root.write_text('')
+    assert ArtifactStore(str(root)).save('model', 1) is None
+
+
+def test_load_or_train_keeps_the_object_when_saving_fails(tmp_path):
+    root = tmp_path / 'not-a-directory'
+    root.write_text('')
+    obj, info = ArtifactStore(str(root)).load_or_train({'n': 1}, lambda: 'trained')
+    assert obj == 'trained' and info['source'] == 'trained' and info['version'] is None
+
+
+def test_load_or_train_reuses_the_saved_artifact(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    calls = []
+
+    def train():
+        calls.append(1)
+        return np.ones(4)
+
+    _, first = store.load_or_train({'n': 1}, train)
+    obj, second = store.load_or_train({'n': 1}, train)
+    assert (first['source'], second['source']) == ('trained', 'disk')
+    assert len(calls) == 1 and obj.sum() == 4
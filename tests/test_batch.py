@@ -0,0 +1,76 @@
+import http.client
+import io
+import threading
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from batch_predict import make_handler
+from utils.batch import PREDICTION_COLUMN, ChunkedWriter
+from utils.data import FEATURE_COLUMNS, get_dataset
+from utils.model_cache import build_pipelines
+
+
+@pytest.fixture(scope='module')
+def server():
+    dataset = get_dataset()
+    X, y = dataset.to_numpy()
+    pipeline = build_pipelines(random_state=0, n_neighbors=5, svm_c=1.0)['knn'].fit(X, y)
+    bundle = {
+        'pipeline': pipeline, 'target_names': dataset.categories,
+        'feature_columns': list(FEATURE_COLUMNS), 'params': {'model': 'knn'},
+    }
+    handler = make_handler(bundle, chunk_rows=10, proba=False)
+
+    class QuietHandler(handler):
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, body):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    conn.request('POST', '/predict', body=body.encode(), headers={'Content-Type': 'text/csv'})
+    return conn, conn.getresponse()
+
+
+def test_predict_streams_every_row(server):
+    df = get_dataset().to_pandas()[FEATURE_COLUMNS]
+    conn, response = post(server, df.to_csv(index=False))
+    assert response.status == 200 and response.getheader('Transfer-Encoding') == 'chunked'
+    scored = pd.read_csv(io.BytesIO(response.read()))
+    conn.close()
+    assert len(scored) == len(df) and scored[PREDICTION_COLUMN].notna().all()
+
+
+def test_bad_input_gets_400_before_streaming(server):
+    conn, response = post(server, "a,b\n1,2\n")
+    assert response.status == 400
+    assert b'missing feature columns' in response.read()
+    conn.close()
+
+
+def test_failure_mid_stream_cuts_the_response_off(server):
+    df = get_dataset().to_pandas()[FEATURE_COLUMNS].astype(str)
+    # The first chunk scores fine; a later one does not parse as numbers
+    df.iloc[25, 0] = 'x'
+    conn, response = post(server, df.to_csv(index=False))
+    assert response.status == 200
+    with pytest.raises(http.client.IncompleteRead):
+        response.read()
+    conn.close()
+
+
+def test_chunked_writer_framing():
+    raw = io.BytesIO()
+    stream = ChunkedWriter(raw)
+    stream.write(b'hello')
+    stream.write(b'')
+    stream.finish()
+    assert raw.getvalue() == b'5\r\nhello\r\n0\r\n\r\n'
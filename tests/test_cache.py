@@ -0,0 +1,64 @@
+import pandas as pd
+
+from utils.cache import LRUCache
+from utils.sql import QueryCache
+
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['hits'] == 3 and cache.stats()['misses'] == 1
+
+
+def test_lru_byte_budget():
+    cache = LRUCache(max_entries=10, max_bytes=10, sizeof=len)
+    cache.put('a', b'x' * 4)
+    cache.put('b', b'x' * 4)
+    cache.put('c', b'x' * 4)
+    assert cache.get('a') is None
+    assert cache.total_bytes == 8 and len(cache) == 2
+    # Replacing an entry does not count its old size twice
+    cache.put('c', b'x' * 2)
+    assert cache.total_bytes == 6
+
+
+def test_lru_never_stores_values_larger_than_the_budget():
+    cache = LRUCache(max_entries=10, max_bytes=10, sizeof=len)
+    cache.put('a', b'x' * 4)
+    cache.put('big', b'x' * 11)
+    assert cache.get('big') is None
+    assert cache.get('a') == b'x' * 4
+
+
+def test_get_or_compute_computes_once():
+    cache = LRUCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'value'
+
+    assert cache.get_or_compute('k', compute) == 'value'
+    assert cache.get_or_compute('k', compute) == 'value'
+    assert len(calls) == 1
+
+
+def _entry(rows, seconds):
+    return {'result': pd.DataFrame({'x': range(rows)}), 'seconds': seconds}
+
+
+def test_query_cache_memory_budget_and_saved_seconds():
+    small, big = _entry(10, 0.5), _entry(200_000, 2.0)
+    cache = QueryCache(max_mb=1)
+    cache.put('small', small)
+    cache.put('big', big)
+    assert cache.get('big') is None
+    assert cache.total_bytes <= 1024 * 1024
+    cache.get('small')
+    cache.get('small')
+    assert cache.stats()['saved_seconds'] == 1.0
@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.figures import figure_stats, render_figure
+
+
+def test_render_figure_caches_and_leaves_no_figures_open():
+    def draw(fig, axes):
+        for i, ax in enumerate(axes):
+            ax.plot([0, 1], [i, i + 1])
+
+    first = render_figure(("test lines",), draw, nrows=2, ncols=1, figsize=(3, 3))
+    assert first.startswith(b'\x89PNG')
+    assert render_figure(("test lines",), draw, nrows=2, ncols=1, figsize=(3, 3)) is first
+    assert figure_stats()['live_figures'] == 0
+
+
+def test_render_figure_from_many_threads():
+    def render(i):
+        return render_figure(("test thread", i), lambda fig, ax: ax.bar([0, 1], [i, 1]), figsize=(2, 2))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        images = list(pool.map(render, range(32)))
+    assert len(set(images)) == 32 and figure_stats()['live_figures'] == 0
+
+
+def test_failed_draw_raises_and_caches_nothing():
+    def draw(fig, ax):
+        raise RuntimeError("bad data")
+
+    with pytest.raises(RuntimeError):
+        render_figure(("test failure",), draw)
+    assert figure_stats()['live_figures'] == 0
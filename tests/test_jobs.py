@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from utils.jobs import Job, JobCancelled, JobExecutor, LatestJob
+
+
+def blocking(started, release, result='done'):
+    """A job that reports progress until release is set, so it can be cancelled at a checkpoint."""
+    def fn(job):
+        started.set()
+        while not release.wait(0.01):
+            job.report(0.5, 'waiting')
+        return result
+    return fn
+
+
+@pytest.fixture
+def executor():
+    executor = JobExecutor(max_workers=2)
+    yield executor
+    executor._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def test_same_key_shares_one_job(executor):
+    started, release = threading.Event(), threading.Event()
+    first = executor.submit('k', blocking(started, release))
+    second = executor.submit('k', blocking(started, release))
+    assert first is second and first.watchers == 2
+    # One watcher leaving does not cancel work the other still waits for
+    executor.release(first)
+    assert not first.cancelled
+    release.set()
+    assert first.wait(5) and first.state == 'done' and first.result == 'done'
+
+
+def test_releasing_the_last_watcher_cancels_the_job(executor):
+    started, release = threading.Event(), threading.Event()
+    job = executor.submit('k', blocking(started, release))
+    assert started.wait(5)
+    executor.release(job)
+    assert job.wait(5) and job.state == 'cancelled'
+    # A new submit for the key starts fresh work
+    release.set()
+    assert executor.submit('k', lambda job: 'again').wait(5)
+
+
+def test_report_raises_once_cancelled():
+    job = Job('k', lambda job: None)
+    job.report(0.2)
+    job.cancel()
+    with pytest.raises(JobCancelled):
+        job.report(0.4)
+
+
+def test_queued_job_is_cancelled_before_it_runs():
+    executor = JobExecutor(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    busy = executor.submit('busy', blocking(started, release))
+    ran = []
+    queued = executor.submit('queued', lambda job: ran.append(1))
+    executor.release(queued)
+    release.set()
+    assert busy.wait(5) and queued.wait(5)
+    assert queued.state == 'cancelled' and not ran
+    executor._pool.shutdown(wait=True)
+
+
+def test_failed_job_keeps_its_error(executor):
+    def fail(job):
+        raise ValueError('bad input')
+
+    slot = LatestJob()
+    slot.request(executor, 'k', fail)
+    assert slot.poll(executor, wait=5)
+    assert isinstance(slot.error, ValueError) and slot.error_key == 'k'
+    # The same key is not retried unless asked to
+    assert slot.request(executor, 'k', fail) is None
+    assert slot.request(executor, 'k', fail, rerun=True) is not None
+
+
+def test_latest_job_supersedes_and_keeps_last_result(executor):
+    slot = LatestJob()
+    slot.request(executor, 'first', lambda job: 1)
+    assert slot.poll(executor, wait=5) and slot.result == 1
+
+    started, release = threading.Event(), threading.Event()
+    old = slot.request(executor, 'slow', blocking(started, release))
+    assert started.wait(5)
+    new = slot.request(executor, 'second', lambda job: 2)
+    assert old.wait(5) and old.state == 'cancelled'
+    # The last completed result stays available while the new job runs
+    assert slot.result == 1 and slot.result_key == 'first'
+    assert new.wait(5) and slot.poll(executor, wait=5)
+    assert slot.result == 2 and slot.result_key == 'second'
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import StandardScaler
+
+from utils.data import get_dataset
+from utils.neighbors import IVFKNN, BlockedBruteKNN, GrowingKNN, synthetic_like
+
+
+@pytest.fixture(scope='module')
+def iris():
+    X, y = get_dataset().to_numpy()
+    return StandardScaler().fit_transform(X), y
+
+
+def test_blocked_brute_matches_sklearn(iris):
+    X, y = iris
+    X_train, y_train = synthetic_like(X, y, 2_000, seed=1)
+    # Tiny blocks so the queries are split across many distance blocks
+    model = BlockedBruteKNN(n_neighbors=7, block_values=10_000).fit(X_train, y_train)
+    reference = KNeighborsClassifier(n_neighbors=7, algorithm='brute').fit(X_train, y_train)
+    dist, _ = model.kneighbors(X)
+    ref_dist, _ = reference.kneighbors(X)
+    np.testing.assert_allclose(dist, ref_dist, atol=1e-6)
+    assert np.mean(model.predict(X) == reference.predict(X)) > 0.99
+
+
+def test_ivf_probing_every_cell_is_exact(iris):
+    X, y = iris
+    X_train, y_train = synthetic_like(X, y, 2_000, seed=2)
+    ivf = IVFKNN(n_neighbors=5, n_lists=16, n_probe=16).fit(X_train, y_train)
+    exact = BlockedBruteKNN(n_neighbors=5).fit(X_train, y_train)
+    np.testing.assert_allclose(ivf.kneighbors(X)[0], exact.kneighbors(X)[0], atol=1e-6)
+
+
+@pytest.mark.parametrize('n_neighbors', [5, 20])
+def test_ivf_with_one_probe_returns_real_neighbours(iris, n_neighbors):
+    X, y = iris
+    ivf = IVFKNN(n_neighbors=n_neighbors, n_probe=1).fit(X, y)
+    dist, ind = ivf.kneighbors(X)
+    assert np.isfinite(dist).all()
+    # No padding slots: every returned neighbour is a distinct training row
+    assert all(len(set(row)) == n_neighbors for row in ind)
+    exact = BlockedBruteKNN(n_neighbors=n_neighbors).fit(X, y)
+    assert np.mean(ivf.predict(X) == y) >= np.mean(exact.predict(X) == y) - 0.05
+
+
+def test_growing_knn_matches_batch_fit(iris):
+    X, y = iris
+    growing = GrowingKNN(n_neighbors=5)
+    for start in range(0, len(X), 40):
+        growing.partial_fit(X[start:start + 40], y[start:start + 40], classes=np.unique(y))
+    exact = BlockedBruteKNN(n_neighbors=5).fit(X, y)
+    np.testing.assert_array_equal(growing.predict(X), exact.predict(X))
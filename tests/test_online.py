@@ -0,0 +1,72 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from utils.data import FEATURE_COLUMNS, SPECIES_COLUMN, get_dataset
+from utils.online import OnlineModels, labelled_batch
+
+
+@pytest.fixture
+def batches():
+    dataset = get_dataset()
+    X, y = dataset.to_numpy()
+    order = np.random.default_rng(0).permutation(len(X))
+    X, y = X[order].astype(np.float64), y[order]
+    return dataset.categories, [(X[i:i + 50], y[i:i + 50]) for i in range(0, len(X), 50)]
+
+
+def test_running_scaler_matches_a_batch_fit(batches):
+    categories, parts = batches
+    models = OnlineModels(categories, random_state=0)
+    for X, y in parts:
+        models.update(X, y)
+    reference = StandardScaler().fit(np.vstack([X for X, _ in parts]))
+    np.testing.assert_allclose(models.scaler.mean_, reference.mean_)
+    np.testing.assert_allclose(models.scaler.scale_, reference.scale_)
+
+
+def test_updates_bump_version_and_history(batches):
+    categories, parts = batches
+    models = OnlineModels(categories, random_state=0)
+    for i, (X, y) in enumerate(parts, start=1):
+        entry = models.update(X, y, source=f"batch {i}")
+        assert entry['version'] == i and entry['rows_added'] == len(X)
+    assert models.version == len(parts) and models.n_rows == 150
+    assert [e['total_rows'] for e in models.history] == [50, 100, 150]
+    with pytest.raises(ValueError):
+        models.update(np.empty((0, 4)), np.empty(0))
+    assert models.version == len(parts)
+
+
+def test_exported_pipelines_predict_like_the_live_models(batches):
+    categories, parts = batches
+    models = OnlineModels(categories, random_state=0)
+    for X, y in parts:
+        models.update(X, y)
+    X_all = np.vstack([X for X, _ in parts])
+    pipelines = {name: models.pipeline(name) for name in ('knn', 'svm')}
+    for name, pipe in pipelines.items():
+        np.testing.assert_array_equal(pipe.predict(X_all), models.predict(name, X_all))
+    # Snapshots do not follow later updates
+    before = pipelines['svm'].named_steps['svm'].coef_.copy()
+    models.update(*parts[0])
+    np.testing.assert_array_equal(pipelines['svm'].named_steps['svm'].coef_, before)
+
+
+def test_models_survive_pickling(batches):
+    categories, parts = batches
+    models = OnlineModels(categories, random_state=0)
+    models.update(*parts[0])
+    restored = pickle.loads(pickle.dumps(models))
+    restored.update(*parts[1])
+    assert restored.version == 2 and models.version == 1
+
+
+def test_labelled_batch_rejects_unknown_species():
+    categories = get_dataset().categories
+    df = pd.DataFrame([[5.1, 3.5, 1.4, 0.2, 'daisy']], columns=FEATURE_COLUMNS + [SPECIES_COLUMN])
+    with pytest.raises(ValueError, match='daisy'):
+        labelled_batch(df, categories)
@@ -0,0 +1,8 @@
+import pandas as pd
+
+from utils.reports import create_sql_pdf
+
+
+def test_sql_pdf_escapes_markup_in_the_query():
+    pdf = create_sql_pdf("SELECT * FROM iris_table\nWHERE petal_length <sepal_width & 1 > 0", pd.DataFrame({'x': [1]}))
+    assert pdf.getvalue().startswith(b'%PDF')
@@ -0,0 +1,115 @@
+import math
+
+import duckdb
+import pyarrow as pa
+import pytest
+
+from utils.data import get_dataset
+from utils.sql import (
+    ConnectionPool, QueryCache, fetch_page, normalize_sql, parse_params, run_query, sql_literal, strip_literals
+)
+
+
+@pytest.fixture(scope='module')
+def pool():
+    return ConnectionPool(get_dataset(), size=2)
+
+
+def test_normalize_sql_drops_comments_and_whitespace():
+    assert normalize_sql("SELECT  1 -- note\n ,\t'a -- b' /* x */ ;") == "SELECT 1 , 'a -- b'"
+    assert normalize_sql("-- header\nSELECT 1") == normalize_sql("SELECT 1;")
+
+
+def test_strip_literals_hides_keywords_in_strings_and_comments():
+    assert 'set' not in strip_literals("SELECT * FROM t WHERE note = 'set' -- set\n/* drop */").lower()
+    # A quote inside a comment does not open a literal that hides the next statement
+    assert 'SET' in strip_literals("SELECT 1 -- '\n; SET threads = 1; --'")
+    # Dollar quotes are not parsed, so the query is checked as written
+    assert strip_literals("SELECT $$'$$; SET x = '$$") == "SELECT $$'$$; SET x = '$$"
+
+
+def test_parse_params_keeps_commas_inside_quotes():
+    assert parse_params("'a,b', 2, 'it''s', \"x\", 1.5") == ['a,b', 2, "it's", 'x', 1.5]
+    assert parse_params("") == []
+
+
+def test_sql_literal_non_finite_floats():
+    for value in (math.nan, math.inf, -math.inf):
+        (result,) = duckdb.sql(f"SELECT {sql_literal(value)}").fetchone()
+        assert repr(result) == repr(value)
+
+
+def test_run_query_keeps_line_comments(pool):
+    cache = QueryCache()
+    leading, _ = run_query(pool, cache, 'v1', "-- five biggest sepals\nSELECT * FROM iris_table LIMIT 5")
+    assert len(leading) == 5
+    inline, _ = run_query(
+        pool, cache, 'v1', "SELECT species_name -- the label\n, COUNT(*) AS n FROM iris_table GROUP BY 1"
+    )
+    assert len(inline) == 3 and inline['n'].sum() == 150
+
+
+def test_run_query_cache_key_includes_parameter_types(pool):
+    cache = QueryCache()
+    as_int, _ = run_query(pool, cache, 'v1', "SELECT $1 AS v", [6])
+    as_float, info = run_query(pool, cache, 'v1', "SELECT $1 AS v", [6.0])
+    assert not info['cached']
+    assert as_int['v'].dtype != as_float['v'].dtype
+
+
+def test_pool_refuses_file_access_and_setting_changes(pool, tmp_path):
+    cache = QueryCache()
+    with pytest.raises(duckdb.PermissionException):
+        run_query(pool, cache, 'v1', f"COPY iris_table TO '{tmp_path / 'out.csv'}'")
+    with pytest.raises(duckdb.Error):
+        run_query(pool, cache, 'v1', "SET threads = 1")
+    assert not (tmp_path / 'out.csv').exists()
+
+
+class FakeCursor:
+    """Replays fixed-size Arrow batches, so pages can straddle batch boundaries."""
+
+    def __init__(self, batch_sizes):
+        self.batch_sizes = batch_sizes
+        self.read = 0
+
+    def execute(self, sql, params=()):
+        return self
+
+    def fetch_record_batch(self, rows):
+        def batches():
+            start = 0
+            for size in self.batch_sizes:
+                self.read += 1
+                yield pa.record_batch({'i': pa.array(range(start, start + size))})
+                start += size
+        return pa.RecordBatchReader.from_batches(pa.schema({'i': pa.int64()}), batches())
+
+
+def test_fetch_page_slices_across_batches():
+    cursor = FakeCursor([7, 3, 11, 9, 10])
+    df, has_more = fetch_page(cursor, 'q', (), page=1, page_size=8)
+    assert df['i'].tolist() == list(range(8, 16)) and has_more
+    # Reading stops once the row after the page is seen
+    assert cursor.read == 3
+    last, has_more = fetch_page(FakeCursor([7, 3, 11, 9, 10]), 'q', (), page=4, page_size=8)
+    assert last['i'].tolist() == list(range(32, 40)) and not has_more
+
+
+def test_fetch_page_never_returns_rows_past_the_cap():
+    df, has_more = fetch_page(FakeCursor([7, 3, 11, 9, 10]), 'q', (), page=1, page_size=8, max_rows=12)
+    assert df['i'].tolist() == list(range(8, 12)) and has_more
+
+
+def test_run_query_reports_has_more_and_capped(pool):
+    cache = QueryCache()
+    sql = "SELECT * FROM range(100)"
+    first, info = run_query(pool, cache, 'v1', sql, page_size=30, max_rows=70)
+    assert len(first) == 30 and info['has_more'] and not info['capped']
+    assert (info['first_row'], info['last_row']) == (1, 30)
+    last, info = run_query(pool, cache, 'v1', sql, page=2, page_size=30, max_rows=70)
+    assert len(last) == 10 and info['capped'] and not info['has_more']
+    _, info = run_query(pool, cache, 'v1', sql, page=2, page_size=30, max_rows=70)
+    assert info['cached']
+    _, info = run_query(pool, cache, 'v1', "SELECT * FROM range(50)", page=1, page_size=30, max_rows=70)
+    assert not info['has_more'] and not info['capped']
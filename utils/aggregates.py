@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+from utils.cache import LRUCache
+from utils.data import FEATURE_COLUMNS, SPECIES_COLUMN, FileDataset
+
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+DEFAULT_BINS = 30
+
+_aggregate_cache = LRUCache(max_entries=16)
+
+
+def bin_index(values, lo, hi, bins):
+    """Equal-width bin of each value over [lo, hi], clipped to the first and last bin.
+
+    The same floor rule as bin_sql(), so NumPy and DuckDB bin identical data identically.
+    """
+    width = (hi - lo) / bins or 1.0
+    idx = np.floor((np.asarray(values, dtype=np.float64) - lo) / width)
+    return np.clip(idx, 0, bins - 1).astype(np.int64)
+
+
+def bin_sql(column, lo, hi, bins):
+    """SQL expression for bin_index() of a column, evaluated in DOUBLE like the NumPy version."""
+    lo, width = float(lo), float((hi - lo) / bins or 1.0)
+    return f"LEAST(GREATEST(FLOOR(({column} - {lo!r}::DOUBLE) / {width!r}::DOUBLE), 0), {bins - 1})::INTEGER"
+
+
+def _histogram_frame(edges, counts, categories):
+    """Long-form frame of (bin center, species, count) for one feature, ready for weighted plotting."""
+    centers = (edges[:-1] + edges[1:]) / 2
+    return pd.DataFrame({
+        'bin_center': np.tile(centers, len(categories)),
+        SPECIES_COLUMN: np.repeat(categories, len(centers)),
+        'count': counts.ravel(),
+    })
+
+
+def _numpy_aggregates(dataset, bins):
+    X, codes = dataset.to_numpy()
+    X = X.astype(np.float64)
+
+    describe = pd.DataFrame(
+        np.vstack([
+            np.full(X.shape[1], X.shape[0], dtype=float),
+            X.mean(axis=0),
+            X.std(axis=0, ddof=1),
+            X.min(axis=0),
+            np.percentile(X, [25, 50, 75], axis=0),
+            X.max(axis=0),
+        ]),
+        index=DESCRIBE_INDEX, columns=FEATURE_COLUMNS,
+    )
+    corr = pd.DataFrame(np.corrcoef(X, rowvar=False), index=FEATURE_COLUMNS, columns=FEATURE_COLUMNS)
+
+    n_species = len(dataset.categories)
+    histograms, bin_edges = {}, {}
+    for i, col in enumerate(FEATURE_COLUMNS):
+        lo, hi = float(X[:, i].min()), float(X[:, i].max())
+        edges = np.linspace(lo, hi, bins + 1)
+        idx = bin_index(X[:, i], lo, hi, bins)
+        # One bincount over (species, bin) pairs gives every species' histogram at once
+        counts = np.bincount(codes * bins + idx, minlength=n_species * bins).reshape(n_species, bins)
+        histograms[col] = _histogram_frame(edges, counts, dataset.categories)
+        bin_edges[col] = edges
+    return {'describe': describe, 'corr': corr, 'histograms': histograms, 'bin_edges': bin_edges, 'n_rows': dataset.n_rows}
+
+
+def _duckdb_aggregates(dataset, bins):
+    # Pass 1: descriptive statistics and all pairwise correlations in one scan
+    stat_exprs = []
+    for col in FEATURE_COLUMNS:
+        stat_exprs += [
+            f"COUNT({col})", f"AVG({col})", f"STDDEV_SAMP({col})", f"MIN({col})",
+            f"QUANTILE_CONT({col}, [0.25, 0.5, 0.75])", f"MAX({col})",
+        ]
+    pairs = [(a, b) for i, a in enumerate(FEATURE_COLUMNS) for b in FEATURE_COLUMNS[i + 1:]]
+    corr_exprs = [f"CORR({a}, {b})" for a, b in pairs]
+    row = dataset.query(f"SELECT {', '.join(stat_exprs + corr_exprs)} FROM {dataset.scan_sql}").fetchone()
+
+    per_col = 6
+    describe_values = []
+    for i in range(len(FEATURE_COLUMNS)):
+        count, mean, std, minimum, quartiles, maximum = row[i * per_col:(i + 1) * per_col]
+        describe_values.append([count, mean, std, minimum, *quartiles, maximum])
+    describe = pd.DataFrame(
+        np.array(describe_values, dtype=float).T, index=DESCRIBE_INDEX, columns=FEATURE_COLUMNS
+    )
+
+    corr = pd.DataFrame(np.eye(len(FEATURE_COLUMNS)), index=FEATURE_COLUMNS, columns=FEATURE_COLUMNS)
+    for (a, b), value in zip(pairs, row[len(FEATURE_COLUMNS) * per_col:]):
+        corr.loc[a, b] = corr.loc[b, a] = value
+
+    # Pass 2: per-species histograms of every feature, binned inside DuckDB
+    edges = {col: np.linspace(describe.loc['min', col], describe.loc['max', col], bins + 1) for col in FEATURE_COLUMNS}
+    bin_exprs = [
+        f"HISTOGRAM({bin_sql(col, describe.loc['min', col], describe.loc['max', col], bins)})" for col in FEATURE_COLUMNS
+    ]
+    rows = dataset.query(
+        f"SELECT {SPECIES_COLUMN}, {', '.join(bin_exprs)} FROM {dataset.scan_sql} "
+        f"GROUP BY {SPECIES_COLUMN} ORDER BY {SPECIES_COLUMN}"
+    ).fetchall()
+
+    categories = [str(r[0]) for r in rows]
+    histograms = {}
+    for i, col in enumerate(FEATURE_COLUMNS):
+        counts = np.zeros((len(categories), bins), dtype=np.int64)
+        for s, r in enumerate(rows):
+            for b, c in (r[i + 1] or {}).items():
+                counts[s, b] = c
+        histograms[col] = _histogram_frame(edges[col], counts, categories)
+    return {'describe': describe, 'corr': corr, 'histograms': histograms, 'bin_edges': edges, 'n_rows': dataset.n_rows}
+
+
+def compute_aggregates(dataset, bins=DEFAULT_BINS):
+    """Descriptive stats, the Pearson correlation matrix and per-species histogram bins.
+
+    File datasets are aggregated in DuckDB, in-memory ones with NumPy; either way
+    the result is a handful of small frames, whatever the size of the data.
+    """
+    if isinstance(dataset, FileDataset):
+        return _duckdb_aggregates(dataset, bins)
+    return _numpy_aggregates(dataset, bins)
+
+
+def get_aggregates(dataset, bins=DEFAULT_BINS):
+    """Cached compute_aggregates(), keyed by dataset version."""
+    return _aggregate_cache.get_or_compute((dataset.version, bins), lambda: compute_aggregates(dataset, bins))
+
+
+def aggregate_cache_stats():
+    return _aggregate_cache.stats()
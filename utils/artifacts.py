@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import sklearn
+
+ARTIFACT_DIR = os.environ.get('IRIS_ARTIFACT_DIR', 'artifacts')
+# Versions kept per key; older ones are deleted after each save
+ARTIFACT_KEEP_VERSIONS = int(os.environ.get('IRIS_ARTIFACT_KEEP_VERSIONS', 2))
+# Total size of the store; the least recently used keys are deleted beyond it
+ARTIFACT_MAX_MB = float(os.environ.get('IRIS_ARTIFACT_MAX_MB', 256))
+_PAYLOAD = 'model.joblib'
+_META = 'meta.json'
+
+
+class ArtifactStore:
+    """Versioned on-disk store of fitted models.
+
+    Each artifact lives in <root>/<key>/v<N>/ as an uncompressed joblib file,
+    so its NumPy arrays (scaler parameters, the KNN training matrix, SVC
+    support vectors and dual coefficients) can be memory-mapped on load.
+    Processes loading the same artifact share one copy through the page cache.
+
+    Saving prunes the store: each key keeps its keep_versions newest versions,
+    and whole keys are deleted, least recently loaded or saved first, while
+    the store is larger than max_mb.
+    """
+
+    def __init__(self, root=ARTIFACT_DIR, keep_versions=ARTIFACT_KEEP_VERSIONS, max_mb=ARTIFACT_MAX_MB):
+        self.root = root
+        self.keep_versions = keep_versions
+        self.max_mb = max_mb
+
+    @staticmethod
+    def key_for(params):
+        """Stable key for a parameter dict; the scikit-learn version is included so old pickles are never reused."""
+        payload = dict(params, sklearn_version=sklearn.__version__)
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+    def versions(self, key):
+        path = os.path.join(self.root, key)
+        if not os.path.isdir(path):
+            return []
+        return sorted(int(name[1:]) for name in os.listdir(path) if name.startswith('v') and name[1:].isdigit())
+
+    def save(self, key, obj, meta=None):
+        """Writes obj as a new version of key and returns the version number.
+
+        The files are written to a temporary directory and renamed into place,
+        so readers never see a half-written artifact. Returns None if nothing
+        could be written (disk full, no permission); callers keep using obj.
+        """
+        key_dir = os.path.join(self.root, key)
+        tmp_dir = None
+        try:
+            os.makedirs(key_dir, exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=key_dir)
+            joblib.dump(obj, os.path.join(tmp_dir, _PAYLOAD))
+            with open(os.path.join(tmp_dir, _META), 'w') as f:
+                json.dump(dict(meta or {}, saved_at=time.time(), sklearn_version=sklearn.__version__), f, default=str)
+            version = (self.versions(key) or [0])[-1] + 1
+            os.rename(tmp_dir, os.path.join(key_dir, f'v{version}'))
+        except OSError:
+            # Either another process saved the same version first (theirs is
+            # just as good) or the store cannot be written at all
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            versions = self.versions(key)
+            return versions[-1] if versions else None
+        self.prune(keep=key)
+        return version
+
+    def prune(self, keep=None):
+        """Deletes old versions and least recently used keys beyond the limits; keep is never deleted."""
+        if not os.path.isdir(self.root):
+            return
+        keys = []
+        for key in os.listdir(self.root):
+            key_dir = os.path.join(self.root, key)
+            if not os.path.isdir(key_dir):
+                continue
+            for version in self.versions(key)[:-max(self.keep_versions, 1)]:
+                shutil.rmtree(os.path.join(key_dir, f'v{version}'), ignore_errors=True)
+            try:
+                keys.append((os.path.getmtime(key_dir), _dir_size(key_dir), key))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in keys)
+        for _, size, key in sorted(keys):
+            if total <= self.max_mb * 1024 * 1024:
+                break
+            if key != keep:
+                shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+                total -= size
+
+    def load(self, key, version=None, mmap=True):
+        """Loads a version of key (the latest by default); returns (obj, version) or (None, None)."""
+        versions = self.versions(key)
+        if not versions:
+            return None, None
+        version = version or versions[-1]
+        path = os.path.join(self.root, key, f'v{version}', _PAYLOAD)
+        obj = joblib.load(path, mmap_mode='r' if mmap else None)
+        try:
+            # Marks the key as recently used for prune()
+            os.utime(os.path.join(self.root, key))
+        except OSError:
+            pass
+        return obj, version
+
+    def meta(self, key, version):
+        with open(os.path.join(self.root, key, f'v{version}', _META)) as f:
+            return json.load(f)
+
+    def load_or_train(self, params, train_fn, save_if=None):
+        """Loads the latest artifact for params, or trains, saves and returns a new one.
+
+        save_if, when given, decides whether a freshly trained object is
+        worth saving. Returns (obj, info) where info records whether the
+        object came from disk, its version and how long loading or training took.
+        """
+        key = self.key_for(params)
+        start = time.perf_counter()
+        try:
+            obj, version = self.load(key)
+        except Exception:
+            # A corrupt or unreadable artifact is treated as missing
+            obj, version = None, None
+        if obj is not None:
+            return obj, {'source': 'disk', 'key': key, 'version': version, 'seconds': time.perf_counter() - start}
+
+        obj = train_fn()
+        seconds = time.perf_counter() - start
+        version = None
+        if save_if is None or save_if(obj):
+            version = self.save(key, obj, meta={'params': params, 'train_seconds': seconds})
+        return obj, {'source': 'trained', 'key': key, 'version': version, 'seconds': seconds}
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
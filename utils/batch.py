@@ -0,0 +1,188 @@
+import io
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.data import FEATURE_COLUMNS
+
+# Rows per chunk; memory use is proportional to this, not to the input size
+DEFAULT_CHUNK_ROWS = 100_000
+MODEL_DIR = os.environ.get('IRIS_MODEL_DIR', 'models')
+PREDICTION_COLUMN = 'predicted_species'
+
+
+def save_model(path, pipeline, target_names, params):
+    """Saves a fitted pipeline together with what is needed to score with it."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    joblib.dump({
+        'pipeline': pipeline,
+        'target_names': list(target_names),
+        'feature_columns': list(FEATURE_COLUMNS),
+        'params': dict(params),
+    }, path)
+
+
+def load_model(path):
+    """Loads a saved model; its arrays are memory-mapped, so processes share one copy."""
+    bundle = joblib.load(path, mmap_mode='r')
+    if not isinstance(bundle, dict) or 'pipeline' not in bundle:
+        raise ValueError(f"{path} is not a saved Iris model")
+    return bundle
+
+
+def _file_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return 'csv'
+    if ext in ('.parquet', '.pq'):
+        return 'parquet'
+    raise ValueError(f"Unsupported file type '{ext}'. Use .csv or .parquet")
+
+
+def iter_chunks(source, chunk_rows=DEFAULT_CHUNK_ROWS, fmt=None):
+    """Yields DataFrames of at most chunk_rows rows from a CSV or Parquet path or file object."""
+    fmt = fmt or _file_format(source)
+    if fmt == 'csv':
+        yield from pd.read_csv(source, chunksize=chunk_rows)
+    else:
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+
+
+def predict_chunk(bundle, df, proba=True):
+    """Scores one chunk: the input columns plus the predicted species (and class probabilities)."""
+    missing = [c for c in bundle['feature_columns'] if c not in df.columns]
+    if missing:
+        raise ValueError(f"Input is missing feature columns: {', '.join(missing)}")
+    X = df[bundle['feature_columns']].to_numpy(dtype=np.float32)
+    pipeline = bundle['pipeline']
+    target_names = np.asarray(bundle['target_names'])
+
+    out = df.copy()
+    if proba and hasattr(pipeline, 'predict_proba'):
+        probabilities = pipeline.predict_proba(X)
+        out[PREDICTION_COLUMN] = target_names[probabilities.argmax(axis=1)]
+        for i, name in enumerate(target_names):
+            out[f'proba_{name}'] = probabilities[:, i]
+    else:
+        out[PREDICTION_COLUMN] = target_names[pipeline.predict(X)]
+    return out
+
+
+class PredictionWriter:
+    """Appends scored chunks to a CSV or Parquet output as they are produced.
+
+    target is a path, or a binary file object such as an HTTP response stream.
+    """
+
+    def __init__(self, target, fmt=None):
+        self.fmt = fmt or _file_format(target)
+        self._owns_file = isinstance(target, str)
+        self._parquet = None
+        self._header_written = False
+        if self.fmt == 'csv':
+            if self._owns_file:
+                self._file = open(target, 'w', newline='', encoding='utf-8')
+            else:
+                self._file = io.TextIOWrapper(target, encoding='utf-8', newline='', write_through=True)
+        else:
+            self._file = target
+
+    def write(self, df):
+        if self.fmt == 'csv':
+            df.to_csv(self._file, header=not self._header_written, index=False)
+            self._header_written = True
+        else:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self._file, table.schema)
+            self._parquet.write_table(table)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self.fmt == 'csv':
+            self._file.flush()
+            if self._owns_file:
+                self._file.close()
+            else:
+                self._file.detach()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def score_chunks(bundle, chunks, writer, proba=True, progress=None):
+    """Scores an iterable of chunks into writer and returns throughput stats."""
+    start = time.perf_counter()
+    rows = n_chunks = 0
+    for chunk in chunks:
+        writer.write(predict_chunk(bundle, chunk, proba=proba))
+        rows += len(chunk)
+        n_chunks += 1
+        if progress is not None:
+            elapsed = time.perf_counter() - start
+            progress(rows, elapsed)
+    seconds = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'chunks': n_chunks,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0.0,
+    }
+
+
+def score_file(bundle, input_path, output_path, chunk_rows=DEFAULT_CHUNK_ROWS, proba=True, progress=None):
+    """Streams input_path through the model into output_path, one chunk at a time."""
+    with PredictionWriter(output_path) as writer:
+        return score_chunks(bundle, iter_chunks(input_path, chunk_rows), writer, proba=proba, progress=progress)
+
+
+class LimitedReader(io.RawIOBase):
+    """Exposes the first `limit` bytes of a stream, e.g. an HTTP request body."""
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.remaining = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.remaining <= 0:
+            return 0
+        data = self.stream.read(min(len(buffer), self.remaining))
+        self.remaining -= len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class ChunkedWriter(io.RawIOBase):
+    """Writes to a stream with HTTP/1.1 chunked transfer encoding.
+
+    finish() sends the terminating chunk; a response that stops without it
+    is seen by clients as incomplete, which is how a mid-stream failure shows.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if data:
+            self.stream.write(b'%x\r\n' % len(data) + bytes(data) + b'\r\n')
+        return len(data)
+
+    def finish(self):
+        self.stream.write(b'0\r\n\r\n')
+        self.stream.flush()
@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """A small thread-safe LRU cache with hit/miss counters.
+
+    Entries are bounded by count and, when sizeof is given, by a total byte
+    budget; values larger than the whole budget are never stored.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            if key in self._entries:
+                self.total_bytes -= self._sizes.pop(key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.total_bytes += size
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.total_bytes > self.max_bytes
+            ):
+                old_key, _ = self._entries.popitem(last=False)
+                self.total_bytes -= self._sizes.pop(old_key)
+
+    def get_or_compute(self, key, compute_fn):
+        """Returns the cached entry for key, computing and storing it on a miss."""
+        entry = self.get(key)
+        if entry is None:
+            entry = compute_fn()
+            self.put(key, entry)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,184 @@
+import functools
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+FEATURE_COLUMNS = ['sepal_length', 'sepal_width', 'petal_length', 'petal_width']
+SPECIES_COLUMN = 'species_name'
+
+# Environment variable pointing the app at an on-disk dataset by default
+DATASET_PATH_ENV = 'IRIS_DATASET_PATH'
+FILE_READERS = {
+    '.parquet': 'read_parquet',
+    '.pq': 'read_parquet',
+    '.csv': 'read_csv_auto',
+}
+
+
+def fingerprint_data(*arrays):
+    """Returns a short hash of the given arrays, used as a dataset version."""
+    h = hashlib.sha1()
+    for arr in arrays:
+        h.update(np.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()[:16]
+
+
+@functools.lru_cache(maxsize=None)
+def _scan_connection():
+    """Process-wide DuckDB connection used for file scans; callers take cursors from it."""
+    import duckdb
+
+    return duckdb.connect(database=':memory:')
+
+
+class IrisDataset:
+    """Columnar in-memory Iris data: float32 features plus a categorical species column.
+
+    The arrays are read-only and shared by every session; the pandas, NumPy
+    and Arrow views are built once and reuse the same buffers.
+    """
+
+    def __init__(self, features, species_codes, categories):
+        # Fortran order keeps every feature column contiguous, so column views are free
+        self.features = np.asfortranarray(features, dtype=np.float32)
+        self.species_codes = np.ascontiguousarray(species_codes, dtype=np.int8)
+        self.categories = list(categories)
+        self.features.flags.writeable = False
+        self.species_codes.flags.writeable = False
+        self.version = fingerprint_data(self.features, self.species_codes)
+        self.label = "Built-in Iris dataset"
+        self._frame = None
+        self._arrow = None
+
+    @property
+    def n_rows(self):
+        return self.features.shape[0]
+
+    def to_numpy(self):
+        """Feature matrix and integer labels, ready for scikit-learn."""
+        return self.features, self.species_codes
+
+    def to_pandas(self):
+        if self._frame is None:
+            df = pd.DataFrame(self.features, columns=FEATURE_COLUMNS, copy=False)
+            df[SPECIES_COLUMN] = pd.Categorical.from_codes(self.species_codes, categories=self.categories)
+            self._frame = df
+        return self._frame
+
+    def to_arrow(self):
+        if self._arrow is None:
+            import pyarrow as pa
+
+            columns = [pa.array(self.features[:, i]) for i in range(len(FEATURE_COLUMNS))]
+            columns.append(pa.DictionaryArray.from_arrays(
+                pa.array(self.species_codes), pa.array(self.categories)
+            ))
+            self._arrow = pa.Table.from_arrays(columns, names=FEATURE_COLUMNS + [SPECIES_COLUMN])
+        return self._arrow
+
+    def register(self, conn, name):
+        """Loads the dataset into a DuckDB table, visible to every cursor of the connection.
+
+        Arrow registrations are local to one connection object, so the table
+        is copied once from the Arrow view instead.
+        """
+        conn.register(f"{name}_arrow", self.to_arrow())
+        try:
+            conn.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM {name}_arrow")
+        finally:
+            conn.unregister(f"{name}_arrow")
+
+    def head(self, n):
+        return self.to_pandas().head(n)
+
+    def sample(self, n, seed=None):
+        df = self.to_pandas()
+        return df.sample(min(n, len(df)), random_state=seed)
+
+    def schema(self):
+        df = self.to_pandas()
+        return pd.DataFrame({
+            "Column Name": df.columns,
+            "Data Type": [str(dtype) for dtype in df.dtypes]
+        })
+
+
+class FileDataset:
+    """An Iris-shaped Parquet or CSV file that is only ever scanned through DuckDB.
+
+    Nothing is materialized in memory: statistics are aggregated inside
+    DuckDB (see utils.aggregates) and plots work from bounded samples.
+    """
+
+    def __init__(self, path):
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in FILE_READERS:
+            raise ValueError(f"Unsupported file type '{ext}'. Use one of: {', '.join(FILE_READERS)}")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Dataset file not found: {path}")
+
+        self.path = os.path.abspath(path)
+        stat = os.stat(self.path)
+        self.version = hashlib.sha1(f"{self.path}:{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()[:16]
+        self.label = os.path.basename(self.path)
+        escaped = self.path.replace("'", "''")
+        self.scan_sql = f"{FILE_READERS[ext]}('{escaped}')"
+
+        missing = [c for c in FEATURE_COLUMNS + [SPECIES_COLUMN] if c not in self.schema()["Column Name"].tolist()]
+        if missing:
+            raise ValueError(f"Dataset file is missing required columns: {', '.join(missing)}")
+        self.n_rows = self.query(f"SELECT COUNT(*) FROM {self.scan_sql}").fetchone()[0]
+
+    def query(self, sql):
+        """Runs SQL on a fresh cursor of the shared scan connection."""
+        return _scan_connection().cursor().execute(sql)
+
+    def register(self, conn, name):
+        """Exposes the file to a DuckDB connection as a view, so every cursor scans it lazily."""
+        conn.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM {self.scan_sql}")
+
+    def head(self, n):
+        return self.query(f"SELECT * FROM {self.scan_sql} LIMIT {int(n)}").fetchdf()
+
+    def sample(self, n, seed=None):
+        seed_clause = f" REPEATABLE ({int(seed)})" if seed is not None else ""
+        return self.query(
+            f"SELECT * FROM {self.scan_sql} USING SAMPLE reservoir({int(n)} ROWS){seed_clause}"
+        ).fetchdf()
+
+    def schema(self):
+        described = self.query(f"DESCRIBE SELECT * FROM {self.scan_sql}").fetchdf()
+        return pd.DataFrame({
+            "Column Name": described["column_name"],
+            "Data Type": described["column_type"]
+        })
+
+
+@functools.lru_cache(maxsize=None)
+def get_dataset():
+    """Loads the Iris dataset once per process."""
+    # scikit-learn (and SciPy behind it) is only imported when the data is first needed
+    from sklearn.datasets import load_iris
+
+    iris = load_iris()
+    return IrisDataset(iris.data, iris.target, iris.target_names)
+
+
+@functools.lru_cache(maxsize=8)
+def _open_file(path, mtime_ns, size):
+    return FileDataset(path)
+
+
+def open_dataset(path=None):
+    """Returns the built-in dataset, or a file-backed one when a path is given.
+
+    File datasets are cached per path and reopened when the file changes on disk.
+    """
+    if not path:
+        return get_dataset()
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dataset file not found: {path}")
+    stat = os.stat(path)
+    return _open_file(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
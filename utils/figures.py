@@ -0,0 +1,57 @@
+import sys
+import threading
+import time
+from io import BytesIO
+
+from utils.cache import LRUCache
+from utils.profiling import span
+
+# Rendered images are small; the byte budget bounds the cache, not the entry count
+_figure_cache = LRUCache(max_entries=256, max_bytes=64 * 1024 * 1024, sizeof=len)
+_render_stats = {'renders': 0, 'render_seconds': 0.0, 'last_render_seconds': 0.0}
+_stats_lock = threading.Lock()
+
+
+def render_figure(key, draw_fn, fmt='png', dpi=100, **subplots_kw):
+    """Returns the image bytes for key, drawing the figure only on a cache miss.
+
+    draw_fn(fig, ax) draws onto a fresh matplotlib Figure; figsize goes to the
+    Figure and the other subplots_kw to fig.subplots(). The figure is built
+    without pyplot, whose global registry is not thread-safe, so concurrent
+    sessions can render at once and nothing is left open afterwards.
+    """
+    label = key[0] if isinstance(key, tuple) else key
+    key = (key, fmt, dpi, tuple(sorted(subplots_kw.items())))
+    image = _figure_cache.get(key)
+    if image is not None:
+        return image
+
+    # Matplotlib is only imported once something actually has to be drawn
+    from matplotlib.figure import Figure
+
+    start = time.perf_counter()
+    with span(f"render figure: {label}"):
+        subplots_kw = dict(subplots_kw)
+        fig = Figure(figsize=subplots_kw.pop('figsize', None))
+        ax = fig.subplots(**subplots_kw)
+        draw_fn(fig, ax)
+        buffer = BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    image = buffer.getvalue()
+    seconds = time.perf_counter() - start
+    with _stats_lock:
+        _render_stats['renders'] += 1
+        _render_stats['render_seconds'] += seconds
+        _render_stats['last_render_seconds'] = seconds
+    _figure_cache.put(key, image)
+    return image
+
+
+def figure_stats():
+    """Cache counters, render timings and the number of figures still open in pyplot."""
+    stats = _figure_cache.stats()
+    with _stats_lock:
+        stats.update(_render_stats)
+    plt = sys.modules.get('matplotlib.pyplot')
+    stats['live_figures'] = len(plt.get_fignums()) if plt is not None else 0
+    return stats
@@ -0,0 +1,263 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Worker threads for background jobs (model fits, SQL queries), shared by every session
+JOB_WORKERS = int(os.environ.get('IRIS_JOB_WORKERS', 4))
+# Finished jobs kept so they can still be looked up by id
+JOB_HISTORY = 256
+
+
+class JobCancelled(Exception):
+    """Raised inside a job at its next progress checkpoint once it has been cancelled."""
+
+
+class Job:
+    """One piece of background work: its state, progress and outcome.
+
+    fn(job) does the work and should call job.report() now and then; that is
+    where a cancelled job stops. Work that cannot be interrupted (a single
+    scikit-learn fit) finishes first and the job stops at the next checkpoint.
+    """
+
+    def __init__(self, key, fn, label=''):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.label = label
+        self.fn = fn
+        self.state = 'queued'
+        self.progress = 0.0
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.watchers = 0
+        self.future = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def seconds(self):
+        """Seconds since the job started running (0 while queued)."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def report(self, fraction, message=''):
+        """Records progress; raises JobCancelled if the job was cancelled meanwhile."""
+        self.progress = min(max(fraction, 0.0), 1.0)
+        self.message = message
+        if self.cancelled:
+            raise JobCancelled(self.id)
+
+    def on_cancel(self, callback):
+        """Calls callback when the job is cancelled, e.g. to interrupt a query.
+
+        Returns a function that unregisters the callback again.
+        """
+        with self._lock:
+            registered = not self.cancelled
+            if registered:
+                self._callbacks.append(callback)
+        if not registered:
+            callback()
+
+        def remove():
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+        return remove
+
+    def cancel(self):
+        """Asks the job to stop; returns False if it had already finished."""
+        with self._lock:
+            if self.done:
+                return False
+            self._cancel.set()
+            callbacks, self._callbacks = self._callbacks, []
+        if self.future is not None and self.future.cancel():
+            # Still queued: it never runs
+            self._finish('cancelled')
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+        return True
+
+    def wait(self, timeout=None):
+        """Blocks until the job has finished or timeout seconds passed; returns whether it finished."""
+        return self._done.wait(timeout)
+
+    def run(self):
+        if self.cancelled:
+            self._finish('cancelled')
+            return
+        self.state = 'running'
+        self.started = time.perf_counter()
+        try:
+            result = self.fn(self)
+        except JobCancelled:
+            self._finish('cancelled')
+        except Exception as e:
+            self.error = e
+            self._finish('failed')
+        else:
+            self.result = result
+            self.progress = 1.0
+            self._finish('done')
+
+    def _finish(self, state):
+        self.state = state
+        self.finished = time.perf_counter()
+        self._done.set()
+
+    def status(self):
+        return {
+            'id': self.id, 'label': self.label, 'state': self.state, 'progress': self.progress,
+            'message': self.message, 'seconds': self.seconds, 'watchers': self.watchers,
+        }
+
+
+class JobExecutor:
+    """A thread pool that runs jobs by key.
+
+    Submitting a key that already has a live job returns that job instead of
+    starting another, so sessions asking for the same work share it. Each
+    submit counts as one watcher; a job is cancelled once every watcher has
+    released it. Threads rather than processes keep fitted models and
+    DuckDB cursors shareable without pickling.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, history=JOB_HISTORY):
+        self.max_workers = max_workers
+        self.history = history
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='iris-job')
+        self._jobs = OrderedDict()
+        self._live = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, label=''):
+        """Starts fn(job) for key, or joins the job already running for it."""
+        with self._lock:
+            job = self._live.get(key)
+            if job is None or job.done or job.cancelled:
+                job = Job(key, fn, label)
+                self._live[key] = job
+                self._jobs[job.id] = job
+                self._trim()
+                job.future = self._pool.submit(self._run, job)
+            job.watchers += 1
+        return job
+
+    def _run(self, job):
+        try:
+            job.run()
+        finally:
+            with self._lock:
+                if self._live.get(job.key) is job:
+                    del self._live[job.key]
+
+    def _trim(self):
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.history:
+                break
+            if self._jobs[job_id].done:
+                del self._jobs[job_id]
+
+    def release(self, job):
+        """Drops one watcher of a job, cancelling it once nobody is waiting for it."""
+        with self._lock:
+            job.watchers = max(job.watchers - 1, 0)
+            orphaned = job.watchers == 0 and not job.done
+        if orphaned:
+            job.cancel()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            states = [job.state for job in self._jobs.values()]
+        return {
+            'workers': self.max_workers,
+            **{state: states.count(state) for state in ('queued', 'running', 'done', 'failed', 'cancelled')},
+        }
+
+
+class LatestJob:
+    """One session's newest job of one kind, plus the last result that completed.
+
+    Asking for a different key releases the previous job (cancelling it unless
+    another session shares it); result and result_key keep the last completed
+    output so the page can show it while the new job runs.
+    """
+
+    def __init__(self):
+        self.job = None
+        self.result = None
+        self.result_key = None
+        self.error = None
+        self.error_key = None
+
+    @property
+    def running(self):
+        return self.job is not None and not self.job.done
+
+    def request(self, executor, key, fn, label='', rerun=False):
+        """Makes key the wanted job and starts it, unless it is running or already has an outcome.
+
+        rerun=True starts it again even if its result or error is current.
+        """
+        if self.job is not None and self.job.key == key:
+            return self.job
+        self.cancel(executor)
+        if not rerun and key in (self.result_key, self.error_key):
+            return None
+        self.job = executor.submit(key, fn, label)
+        return self.job
+
+    def set_result(self, executor, key, result):
+        """Records a result obtained without a job (e.g. from a cache) and drops any running job."""
+        self.cancel(executor)
+        self.result, self.result_key = result, key
+        self.error = self.error_key = None
+
+    def cancel(self, executor):
+        if self.job is not None:
+            executor.release(self.job)
+            self.job = None
+
+    def poll(self, executor, wait=0.0):
+        """Takes the outcome of the wanted job once it has finished.
+
+        Waits up to wait seconds, so quick jobs show up in the same rerun.
+        Returns True if result or error changed.
+        """
+        job = self.job
+        if job is None or not job.wait(wait):
+            return False
+        self.job = None
+        executor.release(job)
+        if job.state == 'done':
+            self.result, self.result_key = job.result, job.key
+            self.error = self.error_key = None
+        elif job.state == 'failed':
+            self.error, self.error_key = job.error, job.key
+        return job.state != 'cancelled'
@@ -0,0 +1,88 @@
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
+from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import Pipeline
+
+from utils.cache import LRUCache
+from utils.neighbors import build_knn
+from utils.profiling import span
+from utils.svm import build_svm
+
+
+# Sidebar defaults of the Classification page, also trained ahead of time by the warm-up
+DEFAULT_MODEL_PARAMS = {
+    "test_size": 0.3,
+    "random_state": 42,
+    "n_neighbors": 5,
+    "svm_c": 1.0,
+    "knn_backend": "auto",
+    "leaf_size": 30,
+    "n_probe": 4,
+    "svm_engine": "svc",
+}
+
+
+class ModelCache(LRUCache):
+    """LRU cache of trained pipelines keyed by the model parameters and data version."""
+
+
+def _evaluate(pipe, X_train, X_test, y_train, y_test, target_names):
+    """Fits a pipeline and collects everything the page displays for it."""
+    try:
+        pipe.fit(X_train, y_train)
+        y_pred = pipe.predict(X_test)
+        return {
+            "pipeline": pipe,
+            "y_pred": y_pred,
+            "accuracy": accuracy_score(y_test, y_pred),
+            "confusion_matrix": confusion_matrix(y_test, y_pred),
+            "report": classification_report(y_test, y_pred, target_names=target_names, output_dict=False),
+            "error": None,
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def build_pipelines(random_state, n_neighbors, svm_c, knn_backend='auto', leaf_size=30, n_probe=4, svm_engine='svc',
+                    n_samples=None):
+    """Unfitted KNN and SVM pipelines, each scaling its inputs first; n_samples is the training size if known."""
+    return {
+        "knn": Pipeline([
+            ('scaler', StandardScaler()),
+            ('knn', build_knn(knn_backend, n_neighbors, leaf_size, n_probe, random_state))
+        ]),
+        "svm": Pipeline([
+            ('scaler', StandardScaler()),
+            *build_svm(svm_engine, svm_c, random_state, n_samples=n_samples)
+        ]),
+    }
+
+
+def train_models(X, y, target_names, test_size, random_state, n_neighbors, svm_c,
+                 knn_backend='auto', leaf_size=30, n_probe=4, svm_engine='svc', progress=None):
+    """Splits the data and trains the KNN and SVM scaling pipelines.
+
+    progress(fraction, message), when given, is called before each stage;
+    a background job passes its report() here so it can be cancelled between fits.
+    """
+    progress = progress or (lambda fraction, message: None)
+    progress(0.0, "splitting data")
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+    pipelines = build_pipelines(
+        random_state, n_neighbors, svm_c, knn_backend, leaf_size, n_probe, svm_engine, n_samples=len(X_train)
+    )
+
+    # Separate spans, so the debug panel shows which of the two fits is slow
+    progress(0.1, "fitting KNN")
+    with span("fit KNN", backend=knn_backend, rows=len(X_train)):
+        knn = _evaluate(pipelines["knn"], X_train, X_test, y_train, y_test, target_names)
+    progress(0.5, "fitting SVM")
+    with span("fit SVM", engine=svm_engine, rows=len(X_train)):
+        svm = _evaluate(pipelines["svm"], X_train, X_test, y_train, y_test, target_names)
+    progress(1.0, "done")
+    return {
+        "n_train": len(X_train),
+        "n_test": len(X_test),
+        "knn": knn,
+        "svm": svm,
+    }
@@ -0,0 +1,289 @@
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.neighbors import KNeighborsClassifier
+
+# Label shown on the page -> backend name passed to build_knn
+KNN_BACKENDS = {
+    "Auto (scikit-learn default)": "auto",
+    "KD-tree": "kd_tree",
+    "Ball tree": "ball_tree",
+    "Brute force (blocked BLAS)": "brute",
+    "IVF (approximate)": "ivf",
+}
+# Distance blocks are capped at this many float64 values (~64 MB)
+BLOCK_VALUES = 8_000_000
+
+
+def _sq_distances(Q, X, x_norms):
+    """Squared Euclidean distances between every row of Q and X, as one matrix product."""
+    d = (Q * Q).sum(axis=1)[:, None] - 2.0 * (Q @ X.T) + x_norms[None, :]
+    return np.maximum(d, 0.0, out=d)
+
+
+def _merge_top_k(best_d, best_i, d, idx, k):
+    """Merges candidate distances d (with training indices idx) into running top-k arrays."""
+    all_d = np.concatenate([best_d, d], axis=1)
+    all_i = np.concatenate([best_i, np.broadcast_to(idx, d.shape)], axis=1)
+    keep = np.argpartition(all_d, k - 1, axis=1)[:, :k] if all_d.shape[1] > k else np.argsort(all_d, axis=1)
+    rows = np.arange(len(all_d))[:, None]
+    return all_d[rows, keep], all_i[rows, keep]
+
+
+class _VotingKNN(ClassifierMixin, BaseEstimator):
+    """Majority vote over the neighbours returned by kneighbors; subclasses do the search."""
+
+    def _store(self, X, y):
+        self.classes_, self._y = np.unique(y, return_inverse=True)
+        self._X = np.ascontiguousarray(X, dtype=np.float64)
+        self._norms = (self._X * self._X).sum(axis=1)
+        self.n_features_in_ = self._X.shape[1]
+
+    def kneighbors(self, X, n_neighbors=None, return_distance=True):
+        k = min(n_neighbors or self.n_neighbors, len(self._X))
+        Q = np.asarray(X, dtype=np.float64)
+        dist, ind = self._search(Q, k)
+        order = np.argsort(dist, axis=1)
+        rows = np.arange(len(Q))[:, None]
+        dist, ind = np.sqrt(dist[rows, order]), ind[rows, order]
+        return (dist, ind) if return_distance else ind
+
+    def predict_proba(self, X):
+        ind = self.kneighbors(X, return_distance=False)
+        labels = self._y[ind]
+        counts = np.zeros((len(labels), len(self.classes_)))
+        for c in range(len(self.classes_)):
+            counts[:, c] = (labels == c).sum(axis=1)
+        return counts / counts.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class BlockedBruteKNN(_VotingKNN):
+    """Exact KNN by brute force, computing distances one block of queries at a time with BLAS."""
+
+    def __init__(self, n_neighbors=5, block_values=BLOCK_VALUES):
+        self.n_neighbors = n_neighbors
+        self.block_values = block_values
+
+    def fit(self, X, y):
+        self._store(X, y)
+        return self
+
+    def _search(self, Q, k):
+        block = max(1, self.block_values // len(self._X))
+        dist = np.empty((len(Q), k))
+        ind = np.empty((len(Q), k), dtype=np.int64)
+        for start in range(0, len(Q), block):
+            d = _sq_distances(Q[start:start + block], self._X, self._norms)
+            part = np.argpartition(d, k - 1, axis=1)[:, :k] if d.shape[1] > k else np.argsort(d, axis=1)
+            ind[start:start + block] = part
+            dist[start:start + block] = np.take_along_axis(d, part, axis=1)
+        return dist, ind
+
+
+class IVFKNN(_VotingKNN):
+    """Approximate KNN with an inverted-file index.
+
+    Training rows are clustered with k-means into n_lists cells; a query only
+    scans the rows of its n_probe nearest cells. More probes raise recall and
+    cost throughput.
+    """
+
+    def __init__(self, n_neighbors=5, n_lists=None, n_probe=4, n_iter=10, random_state=0):
+        self.n_neighbors = n_neighbors
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        self._store(X, y)
+        n = len(self._X)
+        n_lists = min(self.n_lists or max(1, int(np.sqrt(n))), n)
+        rng = np.random.default_rng(self.random_state)
+
+        # k-means on a subsample is enough to place the cells
+        train = self._X[rng.choice(n, min(n, 64 * n_lists), replace=False)]
+        centroids = train[rng.choice(len(train), n_lists, replace=False)].copy()
+        for _ in range(self.n_iter):
+            assign = self._nearest_centroid(train, centroids)
+            counts = np.bincount(assign, minlength=n_lists)
+            sums = np.stack([np.bincount(assign, weights=col, minlength=n_lists) for col in train.T], axis=1)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        # Inverted lists: row ids grouped by cell, with offsets into them
+        assign = self._nearest_centroid(self._X, centroids)
+        self._list_rows = np.argsort(assign, kind='stable')
+        self._list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))])
+        self.centroids_ = centroids
+        return self
+
+    def _nearest_centroid(self, X, centroids):
+        # The query's own norm does not change which centroid is nearest, so it is left out
+        half_norms = 0.5 * (centroids * centroids).sum(axis=1)
+        block = max(1, BLOCK_VALUES // len(centroids))
+        return np.concatenate([
+            (half_norms - X[s:s + block] @ centroids.T).argmin(axis=1) for s in range(0, len(X), block)
+        ])
+
+    def _search(self, Q, k):
+        n_lists = len(self.centroids_)
+        c_norms = (self.centroids_ * self.centroids_).sum(axis=1)
+        order = np.argsort(_sq_distances(Q, self.centroids_, c_norms), axis=1)
+
+        # Probe at least n_probe cells, and more until the probed cells hold k rows,
+        # so every query gets k real candidates
+        sizes = np.diff(self._list_offsets)[order]
+        enough = np.argmax(np.cumsum(sizes, axis=1) >= k, axis=1) + 1
+        n_probes = np.maximum(enough, min(self.n_probe, n_lists))
+        probed = np.zeros((len(Q), n_lists), dtype=bool)
+        ranks = np.arange(n_lists)[None, :] < n_probes[:, None]
+        np.put_along_axis(probed, order, ranks, axis=1)
+
+        best_d = np.full((len(Q), k), np.inf)
+        best_i = np.zeros((len(Q), k), dtype=np.int64)
+        # One pass per cell: every query probing it is scored against its rows in one product
+        for cell in range(n_lists):
+            queries = np.flatnonzero(probed[:, cell])
+            rows = self._list_rows[self._list_offsets[cell]:self._list_offsets[cell + 1]]
+            if len(queries) == 0 or len(rows) == 0:
+                continue
+            d = _sq_distances(Q[queries], self._X[rows], self._norms[rows])
+            best_d[queries], best_i[queries] = _merge_top_k(best_d[queries], best_i[queries], d, rows, k)
+        return best_d, best_i
+
+
+class GrowingKNN(_VotingKNN):
+    """Exact brute-force KNN whose reference set grows with partial_fit.
+
+    Rows are appended to a buffer that doubles when full, so an update costs
+    time proportional to the batch. Rows are kept in raw units; set_scaling()
+    gives the current scaler statistics, and the scaled copy used for search
+    is rebuilt lazily at the next query, which scans every row anyway.
+    """
+
+    def __init__(self, n_neighbors=5, block_values=BLOCK_VALUES):
+        self.n_neighbors = n_neighbors
+        self.block_values = block_values
+
+    def partial_fit(self, X, y, classes=None):
+        X = np.asarray(X, dtype=np.float64)
+        if not hasattr(self, 'classes_'):
+            self.classes_ = np.asarray(classes if classes is not None else np.unique(y))
+            self.n_features_in_ = X.shape[1]
+            self._raw = np.empty((max(len(X), 1024), X.shape[1]))
+            self._labels = np.empty(len(self._raw), dtype=np.int64)
+            self.n_rows_ = 0
+            self.set_scaling(np.zeros(X.shape[1]), np.ones(X.shape[1]))
+        if not np.isin(y, self.classes_).all():
+            raise ValueError("partial_fit got labels that are not in classes")
+        codes = np.searchsorted(self.classes_, y)
+
+        end = self.n_rows_ + len(X)
+        if end > len(self._raw):
+            capacity = max(end, 2 * len(self._raw))
+            self._raw = np.resize(self._raw, (capacity, X.shape[1]))
+            self._labels = np.resize(self._labels, capacity)
+        self._raw[self.n_rows_:end] = X
+        self._labels[self.n_rows_:end] = codes
+        self.n_rows_ = end
+        self._scaled_rows = None
+        return self
+
+    def fit(self, X, y):
+        for name in ('classes_', '_raw', '_labels', 'n_rows_'):
+            self.__dict__.pop(name, None)
+        return self.partial_fit(X, y)
+
+    def set_scaling(self, mean, scale):
+        """Searches in (x - mean) / scale units from the next query on."""
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self._scaled_rows = None
+
+    def _prepare(self):
+        if self._scaled_rows is None:
+            self._X = (self._raw[:self.n_rows_] - self.mean_) / self.scale_
+            self._norms = (self._X * self._X).sum(axis=1)
+            self._y = self._labels[:self.n_rows_]
+            self._scaled_rows = self.n_rows_
+
+    def kneighbors(self, X, n_neighbors=None, return_distance=True):
+        """Neighbours of X, which is given in raw units like the rows passed to partial_fit."""
+        self._prepare()
+        Q = (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+        return super().kneighbors(Q, n_neighbors, return_distance)
+
+    def reference_set(self):
+        """The stored rows (raw units) and their class indices."""
+        return self._raw[:self.n_rows_], self._labels[:self.n_rows_]
+
+    _search = BlockedBruteKNN._search
+
+    def __getstate__(self):
+        # Saved without the spare buffer capacity or the scaled copy
+        state = dict(self.__dict__)
+        if '_raw' in state:
+            state['_raw'] = self._raw[:self.n_rows_].copy()
+            state['_labels'] = self._labels[:self.n_rows_].copy()
+        for name in ('_X', '_norms', '_y'):
+            state.pop(name, None)
+        state['_scaled_rows'] = None
+        return state
+
+
+def build_knn(backend='auto', n_neighbors=5, leaf_size=30, n_probe=4, random_state=0):
+    """The KNN classifier for one neighbour-search backend."""
+    if backend in ('auto', 'kd_tree', 'ball_tree'):
+        return KNeighborsClassifier(n_neighbors=n_neighbors, algorithm=backend, leaf_size=leaf_size)
+    if backend == 'brute':
+        return BlockedBruteKNN(n_neighbors=n_neighbors)
+    if backend == 'ivf':
+        return IVFKNN(n_neighbors=n_neighbors, n_probe=n_probe, random_state=random_state)
+    raise ValueError(f"Unknown KNN backend '{backend}'")
+
+
+def synthetic_like(X, y, n_rows, noise=0.1, seed=0):
+    """Resamples (X, y) to n_rows with Gaussian jitter scaled to each feature's spread."""
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(X), n_rows)
+    jitter = rng.standard_normal((n_rows, X.shape[1])) * (noise * X.std(axis=0))
+    return (X[idx] + jitter).astype(np.float32), y[idx]
+
+
+def benchmark_backends(X_train, y_train, X_test, y_test, backends, n_neighbors=5, leaf_size=30, n_probe=4):
+    """Times index build and queries for each backend, with accuracy and recall@k.
+
+    Inputs should already be scaled. Recall is the share of each query's
+    exact k nearest neighbours (from blocked brute force) that the backend
+    also returned.
+    """
+    exact = BlockedBruteKNN(n_neighbors=n_neighbors).fit(X_train, y_train)
+    exact_ind = exact.kneighbors(X_test, return_distance=False)
+
+    rows = []
+    for label, backend in backends.items():
+        model = build_knn(backend, n_neighbors, leaf_size, n_probe)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ind = model.kneighbors(X_test, return_distance=False)
+        query_seconds = time.perf_counter() - start
+        y_pred = model.predict(X_test)
+
+        hits = sum(len(np.intersect1d(a, b)) for a, b in zip(ind, exact_ind))
+        rows.append({
+            'Backend': label,
+            'Build (ms)': build_seconds * 1000,
+            'Queries/s': len(X_test) / query_seconds if query_seconds else float('inf'),
+            f'Recall@{n_neighbors}': hits / exact_ind.size,
+            'Accuracy': float(np.mean(y_pred == y_test)),
+        })
+    return pd.DataFrame(rows)
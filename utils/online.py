@@ -0,0 +1,110 @@
+import copy
+import threading
+import time
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from utils.data import FEATURE_COLUMNS, SPECIES_COLUMN
+from utils.neighbors import BlockedBruteKNN, GrowingKNN
+from utils.svm import N_COMPONENTS, streaming_svm
+
+# Update records kept per model for the page's history table
+HISTORY_LENGTH = 200
+
+
+class OnlineModels:
+    """KNN and SVM classifiers that learn from labelled batches as they arrive.
+
+    Each update touches only the new rows. The StandardScaler's running mean
+    and variance are updated with partial_fit. The KNN reference set grows
+    by appending the rows. The SVM (random Fourier features with a hinge-loss
+    SGD classifier) takes one partial_fit step on the batch. Every update
+    bumps the version and adds an entry to the history.
+    """
+
+    def __init__(self, categories, n_neighbors=5, svm_c=1.0, random_state=42, n_components=N_COMPONENTS):
+        self.categories = list(categories)
+        self.classes = np.arange(len(self.categories))
+        self.params = {
+            "n_neighbors": n_neighbors, "svm_c": svm_c, "random_state": random_state, "n_components": n_components,
+        }
+        self.scaler = StandardScaler()
+        self.knn = GrowingKNN(n_neighbors=n_neighbors)
+        self.features, self.svm = None, None
+        self.version = 0
+        self.n_rows = 0
+        self.history = []
+        self._lock = threading.Lock()
+
+    def update(self, X, y, source=''):
+        """Learns from one labelled batch (y holds category codes); returns its history entry."""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        if len(X) == 0:
+            raise ValueError("Empty batch")
+        with self._lock:
+            start = time.perf_counter()
+            self.scaler.partial_fit(X)
+            self.knn.partial_fit(X, y, classes=self.classes)
+            self.knn.set_scaling(self.scaler.mean_, self.scaler.scale_)
+            if self.svm is None:
+                self.features, self.svm = streaming_svm(X.shape[1], self.params["svm_c"], self.params["random_state"],
+                                                        self.params["n_components"])
+            self.svm.partial_fit(self.features.transform(self.scaler.transform(X)), y, classes=self.classes)
+            self.version += 1
+            self.n_rows += len(X)
+            entry = {
+                "version": self.version,
+                "rows_added": len(X),
+                "total_rows": self.n_rows,
+                "seconds": time.perf_counter() - start,
+                "source": source,
+                "at": time.time(),
+            }
+            self.history = (self.history + [entry])[-HISTORY_LENGTH:]
+        return entry
+
+    def predict(self, name, X):
+        """Category codes predicted by the 'knn' or 'svm' model."""
+        X = np.asarray(X, dtype=np.float64)
+        with self._lock:
+            if self.version == 0:
+                raise ValueError("The online models have not seen any data yet")
+            if name == 'knn':
+                return self.knn.predict(X)
+            return self.svm.predict(self.features.transform(self.scaler.transform(X)))
+
+    def pipeline(self, name):
+        """A standalone scikit-learn Pipeline snapshot of one model, e.g. for batch_predict.py."""
+        with self._lock:
+            scaler = copy.deepcopy(self.scaler)
+            if name == 'knn':
+                rows, labels = self.knn.reference_set()
+                knn = BlockedBruteKNN(n_neighbors=self.params["n_neighbors"]).fit(scaler.transform(rows), labels)
+                return Pipeline([('scaler', scaler), ('knn', knn)])
+            return Pipeline([('scaler', scaler), ('features', copy.deepcopy(self.features)),
+                             ('svm', copy.deepcopy(self.svm))])
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+def labelled_batch(df, categories):
+    """Feature matrix and category codes of a DataFrame of labelled measurements."""
+    missing = [c for c in FEATURE_COLUMNS + [SPECIES_COLUMN] if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    codes = {name: i for i, name in enumerate(categories)}
+    y = df[SPECIES_COLUMN].astype(str).map(codes)
+    if y.isna().any():
+        unknown = sorted(set(df.loc[y.isna(), SPECIES_COLUMN].astype(str)))[:5]
+        raise ValueError(f"Unknown species: {', '.join(unknown)} (expected one of {', '.join(categories)})")
+    return df[FEATURE_COLUMNS].to_numpy(dtype=np.float64), y.to_numpy(dtype=np.int64)
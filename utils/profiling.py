@@ -0,0 +1,214 @@
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# Set IRIS_PROFILE=1 to record timing spans on every rerun and show the debug panel
+PROFILE_ENABLED = os.environ.get('IRIS_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+_local = threading.local()
+# Spans recorded outside a rerun, e.g. PDFs built when a download button is clicked
+_background = deque(maxlen=200)
+_background_lock = threading.Lock()
+_origin = time.perf_counter()
+# tracemalloc is process-wide: reruns and benchmarks share it through a reference count
+_tracing_lock = threading.Lock()
+_tracing = {'users': 0, 'owned': False}
+
+
+def start_tracing():
+    """Starts tracemalloc for one more user; it keeps running until every user has stopped."""
+    with _tracing_lock:
+        if _tracing['users'] == 0:
+            _tracing['owned'] = not tracemalloc.is_tracing()
+            if _tracing['owned']:
+                tracemalloc.start()
+        _tracing['users'] += 1
+
+
+def stop_tracing():
+    with _tracing_lock:
+        _tracing['users'] = max(_tracing['users'] - 1, 0)
+        if _tracing['users'] == 0 and _tracing['owned']:
+            tracemalloc.stop()
+            _tracing['owned'] = False
+
+
+def _peak_begin():
+    """Current traced bytes at the start of a measured block, with a fresh peak for it.
+
+    The peak reached so far is handed to the enclosing block on this thread
+    before reset_peak(), so nested blocks do not hide their parent's peak.
+    Blocks running at the same time on other threads still share one peak.
+    """
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    stack = _local.__dict__.setdefault('peaks', [])
+    if stack:
+        stack[-1] = max(stack[-1], peak)
+    tracemalloc.reset_peak()
+    stack.append(current)
+    return current
+
+
+def _peak_end(before):
+    """(memory delta, peak growth) in bytes of a block started with _peak_begin."""
+    if before is None:
+        return 0, 0
+    stack = _local.peaks
+    floor = stack.pop()
+    if not tracemalloc.is_tracing():
+        return 0, 0
+    current, peak = tracemalloc.get_traced_memory()
+    peak = max(floor, peak)
+    if stack:
+        stack[-1] = max(stack[-1], peak)
+    return current - before, peak - before
+
+
+@contextlib.contextmanager
+def measure_memory():
+    """Traces the block and fills in its memory 'delta' and 'peak' (bytes above the start)."""
+    result = {'delta': 0, 'peak': 0}
+    start_tracing()
+    try:
+        before = _peak_begin()
+        try:
+            yield result
+        finally:
+            result['delta'], result['peak'] = _peak_end(before)
+    finally:
+        stop_tracing()
+
+
+class RerunTrace:
+    """Timing spans (with traced memory deltas) recorded during one rerun of one page."""
+
+    def __init__(self, page, profile=False):
+        self.page = page
+        self.spans = []
+        self.depth = 0
+        self.thread_id = threading.get_ident()
+        self.start = time.perf_counter()
+        self.end = None
+        self.profile = cProfile.Profile() if profile else None
+        self._tracing = False
+
+    def begin(self):
+        start_tracing()
+        self._tracing = True
+        if self.profile is not None:
+            self.profile.enable()
+
+    def finish(self):
+        if self.profile is not None:
+            self.profile.disable()
+        if self._tracing:
+            stop_tracing()
+            self._tracing = False
+        self.end = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def summary(self):
+        """Spans in start order as rows for a table, indented by nesting depth."""
+        return [{
+            'Span': '  ' * s['depth'] + s['name'],
+            'ms': s['seconds'] * 1000,
+            'Memory Δ (MB)': s['memory_delta'] / 1024 / 1024,
+            'Peak (MB)': s['memory_peak'] / 1024 / 1024,
+        } for s in sorted(self.spans, key=lambda s: s['start'])]
+
+    def chrome_trace(self):
+        """The spans as Chrome trace-event JSON (open in chrome://tracing or Perfetto)."""
+        events = [{
+            'name': s['name'], 'ph': 'X', 'pid': os.getpid(), 'tid': self.thread_id,
+            'ts': (s['start'] - _origin) * 1e6, 'dur': s['seconds'] * 1e6,
+            'args': dict(s['args'], memory_delta_bytes=s['memory_delta'], memory_peak_bytes=s['memory_peak']),
+        } for s in self.spans]
+        events.append({
+            'name': f"rerun: {self.page}", 'ph': 'X', 'pid': os.getpid(), 'tid': self.thread_id,
+            'ts': (self.start - _origin) * 1e6, 'dur': self.seconds * 1e6, 'args': {},
+        })
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}).encode()
+
+    def pstats_dump(self):
+        """The cProfile statistics of the rerun in pstats' binary format, or None if not profiled."""
+        if self.profile is None:
+            return None
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'rerun.pstats')
+            pstats.Stats(self.profile).dump_stats(path)
+            with open(path, 'rb') as f:
+                return f.read()
+
+
+def start_rerun(page, profile=False):
+    """Starts recording spans for this rerun on the current thread; returns None when disabled."""
+    if not PROFILE_ENABLED:
+        _local.trace = None
+        return None
+    # A rerun cut short by st.stop() never finished its trace
+    finish_rerun()
+    trace = RerunTrace(page, profile=profile)
+    _local.trace = trace
+    trace.begin()
+    return trace
+
+
+def finish_rerun():
+    """Stops recording and returns the finished trace (None when profiling is off)."""
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    if trace is not None:
+        trace.finish()
+    return trace
+
+
+@contextlib.contextmanager
+def span(name, **args):
+    """Times a block as a named span of the current rerun.
+
+    Costs nothing when profiling is off. Outside a rerun (for example a
+    download callback) the span is kept in a small process-wide log instead.
+    """
+    if not PROFILE_ENABLED:
+        yield
+        return
+    trace = getattr(_local, 'trace', None)
+    before = _peak_begin()
+    depth = trace.depth if trace is not None else 0
+    if trace is not None:
+        trace.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        memory_delta, memory_peak = _peak_end(before)
+        record = {
+            'name': name, 'start': start, 'seconds': seconds, 'depth': depth,
+            'memory_delta': memory_delta, 'memory_peak': memory_peak, 'args': args,
+        }
+        if trace is not None:
+            trace.depth -= 1
+            trace.spans.append(record)
+        else:
+            record['at'] = time.time()
+            with _background_lock:
+                _background.append(record)
+
+
+def background_spans():
+    """Most recent spans recorded outside reruns, newest first."""
+    with _background_lock:
+        return list(reversed(_background))
@@ -0,0 +1,222 @@
+import hashlib
+import os
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from utils.cache import LRUCache
+from utils.profiling import span
+
+# Frames in reports are rendered as tables of at most this many rows; the rest is summarised
+REPORT_MAX_ROWS = int(os.environ.get('IRIS_REPORT_MAX_ROWS', 2_000))
+# Rows per Table flowable; small tables keep ReportLab's page splitting linear
+REPORT_CHUNK_ROWS = 200
+# Longer cell values are cut to this many characters
+REPORT_MAX_CELL_CHARS = 40
+
+_report_cache = LRUCache(max_entries=32, max_bytes=64 * 1024 * 1024, sizeof=len)
+
+
+def frame_hash(df):
+    """Content hash of a DataFrame (values, index and column names)."""
+    import pandas as pd
+
+    h = hashlib.sha1()
+    h.update(repr(list(df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def cached_report(key, build_fn):
+    """Returns the PDF bytes for key, building the report only on a cache miss.
+
+    Pages pass a zero-argument wrapper of this to st.download_button, so
+    ReportLab runs when the button is clicked rather than on every rerun.
+    """
+    def build():
+        with span(f"build pdf: {key[0]}"):
+            return build_fn().getvalue()
+
+    return _report_cache.get_or_compute(key, build)
+
+
+def _cell_strings(values):
+    """Column values as display strings, formatted for the whole column at once."""
+    if values.dtype.kind == 'f':
+        text = np.char.mod('%.4g', values)
+        return np.where(np.isnan(values), '', text)
+    if values.dtype.kind in 'iub':
+        return values.astype(str)
+    text = values.astype(str)
+    too_long = np.char.str_len(text) > REPORT_MAX_CELL_CHARS
+    if too_long.any():
+        cut = np.char.add(text.astype(f'<U{REPORT_MAX_CELL_CHARS - 1}'), '…')
+        text = np.where(too_long, cut, text)
+    return text
+
+
+def frame_flowables(df, width, max_rows=REPORT_MAX_ROWS, chunk_rows=REPORT_CHUNK_ROWS, index=False):
+    """A DataFrame as a list of ReportLab flowables: paginated tables plus a summary.
+
+    Only the first max_rows rows are formatted. They are split into Tables
+    of chunk_rows rows, each repeating the header, with fixed column widths
+    so ReportLab never measures individual cells. Capped frames end with a
+    note and describe() of the numeric columns over all rows.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    shown = df.iloc[:max_rows]
+    if index:
+        shown = shown.reset_index()
+    if len(shown.columns) == 0:
+        return [Paragraph("No columns to show.", styles['BodyText'])]
+
+    header = [str(c)[:REPORT_MAX_CELL_CHARS] for c in shown.columns]
+    columns = [_cell_strings(shown[c].to_numpy()) for c in shown.columns]
+    rows = np.column_stack(columns).tolist() if len(shown) else []
+
+    font_size = 8 if len(header) <= 8 else 6
+    col_widths = [width / len(header)] * len(header)
+    table_style = TableStyle([
+        ('FONT', (0, 0), (-1, -1), 'Helvetica', font_size),
+        ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', font_size),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.whitesmoke]),
+        ('TOPPADDING', (0, 0), (-1, -1), 1),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+    ])
+
+    story = []
+    for start in range(0, max(len(rows), 1), chunk_rows):
+        story.append(Table([header] + rows[start:start + chunk_rows], colWidths=col_widths,
+                           repeatRows=1, style=table_style, hAlign='LEFT'))
+
+    if len(df) > max_rows:
+        story.append(Spacer(1, 8))
+        story.append(Paragraph(
+            f"Showing the first {max_rows:,} of {len(df):,} rows. "
+            "Summary statistics below cover all rows.", styles['Italic']))
+        numeric = df.select_dtypes('number')
+        if len(numeric.columns):
+            story.append(Spacer(1, 4))
+            story.extend(frame_flowables(numeric.describe(), width, index=True))
+    return story
+
+
+def report_cache_stats():
+    return _report_cache.stats()
+
+
+def create_home_pdf(intro_markdown, details_markdown, anatomy_markdown):
+    # ReportLab is imported on first use: reports are only built when a download is clicked
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph("IRIS Classification Project: An Introduction", styles['h1']))
+    story.append(Paragraph("Welcome to the Interactive Data Analysis and Classification App!", styles['h2']))
+
+    # Clean up markdown for PDF
+    story.append(Paragraph(intro_markdown.replace('*', ''), styles['BodyText']))
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph("The Iris Dataset Overview", styles['h2']))
+    story.append(Paragraph("Dataset Details", styles['h3']))
+    story.append(Paragraph(details_markdown.replace('*', ''), styles['BodyText']))
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph("Anatomy of the Iris Flower", styles['h3']))
+    story.append(Paragraph(anatomy_markdown.replace('*', '').replace('    *', ' - '), styles['BodyText']))
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def create_eda_pdf(stats_df):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph("Basic EDA Report", styles['h1']))
+    story.append(Paragraph("Descriptive Statistics", styles['h2']))
+
+    story.extend(frame_flowables(stats_df, doc.width, index=True))
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def create_classification_pdf(params, knn_report, svm_report):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph("Model Classification Report", styles['h1']))
+    story.append(Paragraph("Parameters", styles['h2']))
+
+    param_text = f"""
+    Test Set Size Ratio: {params['test_size']}<br/>
+    Random State (Seed): {params['random_state']}<br/>
+    KNN - Neighbors (k): {params['n_neighbors']}<br/>
+    SVM - Regularization (C): {params['svm_c']}
+    """
+    story.append(Paragraph(param_text, styles['BodyText']))
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph("K-Nearest Neighbors (KNN) Report", styles['h2']))
+    story.append(Paragraph(knn_report.replace("\n", "<br/>").replace(" ", "&nbsp;"), styles['Code']))
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph("Support Vector Machine (SVM) Report", styles['h2']))
+    story.append(Paragraph(svm_report.replace("\n", "<br/>").replace(" ", "&nbsp;"), styles['Code']))
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def create_sql_pdf(query, data_df):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph("SQL Playground Report", styles['h1']))
+    story.append(Paragraph("Query:", styles['h3']))
+    # Paragraph text is markup, so a comparison like x <y must be escaped
+    story.append(Paragraph(escape(query).replace("\n", "<br/>"), styles['Code']))
+    story.append(Paragraph("Results:", styles['h3']))
+
+    story.append(Paragraph(f"{len(data_df):,} rows, {len(data_df.columns)} columns", styles['BodyText']))
+    story.append(Spacer(1, 4))
+    story.extend(frame_flowables(data_df, doc.width))
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,162 @@
+import time
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from utils.aggregates import bin_index, bin_sql
+from utils.cache import LRUCache
+from utils.data import SPECIES_COLUMN, FileDataset
+
+# Above this many rows the scatter matrix stops sending every point to the browser
+FULL_SCATTER_MAX_ROWS = 5000
+SAMPLE_PER_SPECIES = 1000
+DENSITY_BINS = 40
+
+SCATTER_MODES = ["Auto", "All points", "Stratified sample", "Density tiles"]
+
+_scatter_cache = LRUCache(max_entries=16)
+
+
+def resolve_mode(mode, n_rows):
+    """Turns "Auto" into a concrete mode; "All points" is only honoured for small data."""
+    if mode == "Auto" or (mode == "All points" and n_rows > FULL_SCATTER_MAX_ROWS):
+        return "All points" if n_rows <= FULL_SCATTER_MAX_ROWS else "Stratified sample"
+    return mode
+
+
+def stratified_sample(dataset, per_species=SAMPLE_PER_SPECIES, seed=42):
+    """At most per_species rows of each species, so rare species stay visible."""
+    def compute():
+        if isinstance(dataset, FileDataset):
+            species = dataset.query(f"SELECT DISTINCT {SPECIES_COLUMN} FROM {dataset.scan_sql}").fetchall()
+            parts = []
+            for (name,) in species:
+                escaped = str(name).replace("'", "''")
+                parts.append(
+                    f"SELECT * FROM (SELECT * FROM {dataset.scan_sql} WHERE {SPECIES_COLUMN} = '{escaped}') "
+                    f"USING SAMPLE reservoir({int(per_species)} ROWS) REPEATABLE ({int(seed)})"
+                )
+            return dataset.query(" UNION ALL ".join(parts)).fetchdf()
+        shuffled = dataset.to_pandas().sample(frac=1, random_state=seed)
+        return shuffled.groupby(SPECIES_COLUMN, observed=True).head(per_species)
+    return _scatter_cache.get_or_compute(("sample", dataset.version, per_species, seed), compute)
+
+
+def density_tiles(dataset, dims, bins=DENSITY_BINS):
+    """2D binned counts for every feature pair in dims: {(x, y): (x_edges, y_edges, counts)}."""
+    dims = tuple(dims)
+
+    def compute():
+        pairs = [(a, b) for i, a in enumerate(dims) for b in dims[i + 1:]]
+        tiles = {}
+        if isinstance(dataset, FileDataset):
+            bounds = dataset.query(
+                "SELECT " + ", ".join(f"MIN({c}), MAX({c})" for c in dims) + f" FROM {dataset.scan_sql}"
+            ).fetchone()
+            edges = {c: np.linspace(bounds[2 * i], bounds[2 * i + 1], bins + 1) for i, c in enumerate(dims)}
+            bin_cols = [f"{bin_sql(c, bounds[2 * i], bounds[2 * i + 1], bins)} AS bin_{c}" for i, c in enumerate(dims)]
+            # One scan with a grouping set per feature pair; GROUPING_ID tells the sets apart
+            group_cols = [f"bin_{c}" for c in dims]
+            grouping_sets = ", ".join(f"(bin_{a}, bin_{b})" for a, b in pairs)
+            binned = dataset.query(
+                f"SELECT {', '.join(group_cols)}, GROUPING_ID({', '.join(group_cols)}) AS gid, COUNT(*) AS n "
+                f"FROM (SELECT {', '.join(bin_cols)} FROM {dataset.scan_sql}) "
+                f"GROUP BY GROUPING SETS ({grouping_sets})"
+            ).fetchdf()
+            n = len(dims)
+            for a, b in pairs:
+                ia, ib = dims.index(a), dims.index(b)
+                gid = sum(1 << (n - 1 - k) for k in range(n) if k not in (ia, ib))
+                part = binned[(binned['gid'] == gid) & binned[f"bin_{a}"].notna() & binned[f"bin_{b}"].notna()]
+                counts = np.zeros((bins, bins), dtype=np.int64)
+                counts[part[f"bin_{b}"].astype(int), part[f"bin_{a}"].astype(int)] = part['n'].to_numpy()
+                tiles[(a, b)] = (edges[a], edges[b], counts)
+        else:
+            # Same edges and floor rule as the DuckDB branch above
+            df = dataset.to_pandas()
+            edges, idx = {}, {}
+            for c in dims:
+                lo, hi = float(df[c].min()), float(df[c].max())
+                edges[c] = np.linspace(lo, hi, bins + 1)
+                idx[c] = bin_index(df[c].to_numpy(), lo, hi, bins)
+            for a, b in pairs:
+                counts = np.bincount(idx[b] * bins + idx[a], minlength=bins * bins).reshape(bins, bins)
+                tiles[(a, b)] = (edges[a], edges[b], counts)
+        # Mirror each tile for the other half of the matrix
+        for (a, b), (x_edges, y_edges, counts) in list(tiles.items()):
+            tiles[(b, a)] = (y_edges, x_edges, counts.T)
+        return tiles
+    return _scatter_cache.get_or_compute(("density", dataset.version, dims, bins), compute)
+
+
+def _density_figure(dataset, dims, histograms, bin_edges):
+    tiles = density_tiles(dataset, dims)
+    n = len(dims)
+    fig = make_subplots(rows=n, cols=n, shared_xaxes='columns', horizontal_spacing=0.02, vertical_spacing=0.02)
+    colors = px.colors.qualitative.Plotly
+    for i, row_feat in enumerate(dims):
+        for j, col_feat in enumerate(dims):
+            if i == j:
+                # Diagonal: per-species histograms straight from the EDA aggregates
+                hist = histograms[col_feat]
+                width = np.diff(bin_edges[col_feat])[0]
+                for k, (species, group) in enumerate(hist.groupby(SPECIES_COLUMN, sort=False)):
+                    fig.add_trace(go.Bar(
+                        x=group['bin_center'], y=group['count'], width=width, name=species,
+                        marker_color=colors[k % len(colors)], opacity=0.7,
+                        legendgroup=species, showlegend=(i == 0),
+                    ), row=i + 1, col=j + 1)
+            else:
+                x_edges, y_edges, counts = tiles[(col_feat, row_feat)]
+                fig.add_trace(go.Heatmap(
+                    x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2,
+                    z=np.round(np.log1p(counts), 2), colorscale='Viridis', showscale=False,
+                    hovertemplate=f"{col_feat}=%{{x:.2f}}<br>{row_feat}=%{{y:.2f}}<br>log(1+count)=%{{z:.2f}}<extra></extra>",
+                ), row=i + 1, col=j + 1)
+            if i == n - 1:
+                fig.update_xaxes(title_text=col_feat, row=i + 1, col=j + 1)
+            if j == 0:
+                fig.update_yaxes(title_text=row_feat, row=i + 1, col=j + 1)
+    fig.update_layout(barmode='overlay', title="Pairwise Density (binned counts)", height=900)
+    return fig
+
+
+def build_scatter_matrix(dataset, dims, mode, aggregates):
+    """Builds the pair plot figure with a bounded payload.
+
+    Returns (figure, info) where info holds the resolved mode, the number of
+    points sent, the JSON payload size in bytes and the build time in seconds.
+    """
+    start = time.perf_counter()
+    mode = resolve_mode(mode, dataset.n_rows)
+    if mode == "Density tiles":
+        fig = _density_figure(dataset, dims, aggregates['histograms'], aggregates['bin_edges'])
+        n_points = 0
+    else:
+        if mode == "All points":
+            plot_df = dataset.head(dataset.n_rows)
+        else:
+            plot_df = stratified_sample(dataset)
+        n_points = len(plot_df)
+        fig = px.scatter_matrix(
+            plot_df,
+            dimensions=dims,
+            color=SPECIES_COLUMN,
+            title="Interactive Pairwise Relationships",
+            opacity=0.8,
+            height=900
+        )
+        fig.update_traces(diagonal_visible=True, marker=dict(size=6 if n_points <= FULL_SCATTER_MAX_ROWS else 3))
+    fig.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    payload_bytes = len(fig.to_json())
+    info = {
+        "mode": mode,
+        "points": n_points,
+        "payload_bytes": payload_bytes,
+        "build_seconds": time.perf_counter() - start,
+    }
+    return fig, info
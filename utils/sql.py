@@ -0,0 +1,357 @@
+import contextlib
+import math
+import os
+import queue
+import re
+import threading
+import time
+
+import duckdb
+import pyarrow as pa
+
+from utils.cache import LRUCache
+from utils.jobs import JobCancelled
+from utils.profiling import span
+
+# Memory budget for cached query results, shared by all sessions of the process
+QUERY_CACHE_MB = float(os.environ.get('IRIS_SQL_CACHE_MB', 64))
+# DuckDB resources per connection pool (one pool per dataset); empty means DuckDB's default
+POOL_THREADS = os.environ.get('IRIS_DUCKDB_THREADS', '')
+POOL_MEMORY_LIMIT = os.environ.get('IRIS_DUCKDB_MEMORY_LIMIT', '')
+POOL_SIZE = int(os.environ.get('IRIS_SQL_POOL_SIZE', os.cpu_count() or 4))
+# Fixed memory_limit of each pool unless IRIS_DUCKDB_MEMORY_LIMIT is set. DuckDB
+# applies it to the whole database, not per query: concurrent queries share it
+# and a single query may use all of it.
+POOL_MEMORY_MB = int(os.environ.get('IRIS_SQL_MEMORY_MB', 2048))
+# Wall-clock limit per query
+QUERY_TIMEOUT_SECONDS = float(os.environ.get('IRIS_SQL_TIMEOUT_SECONDS', 10))
+# Results are streamed in Arrow record batches and shown one page at a time
+PAGE_SIZE = 500
+MAX_RESULT_ROWS = int(os.environ.get('IRIS_SQL_MAX_ROWS', 100_000))
+
+# Shown on the SQL page and replayed by benchmark.py
+EXAMPLE_QUERIES = {
+    "View all data": "SELECT * FROM iris_table LIMIT 20;",
+    "Count per species": "SELECT species_name, COUNT(*) AS count FROM iris_table GROUP BY species_name;",
+    "Average petal length by species": "SELECT species_name, AVG(petal_length) AS avg_petal_length FROM iris_table GROUP BY species_name;",
+    "Find largest sepals": "SELECT * FROM iris_table ORDER BY sepal_length DESC, sepal_width DESC LIMIT 5;",
+    "Species with long petals (parameterized)": "SELECT * FROM iris_table WHERE species_name = $1 AND petal_length > $2;"
+}
+EXAMPLE_PARAMS = {
+    "Species with long petals (parameterized)": "'virginica', 6.0"
+}
+
+# One pool per dataset version for the whole process (the SQL page and the warm-up)
+_pool_cache = LRUCache(max_entries=8)
+_pool_lock = threading.Lock()
+
+_TOKEN_RE = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|\s+")
+# Comments, string literals and quoted identifiers, scanned left to right
+_LITERAL_RE = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"", re.DOTALL)
+# Quoted values, commas and everything else in a parameter list
+_PARAM_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|,|[^,'\"]+|.")
+
+
+def _unparsed(query):
+    """Whether query uses dollar quotes or backslash escapes, which the regexes here do not parse."""
+    return '\\' in query or re.search(r'\$[A-Za-z_]*\$', query) is not None
+
+
+def normalize_sql(query):
+    """Drops comments, collapses whitespace outside string literals and drops trailing semicolons.
+
+    Only used as the cache key; the query itself runs as written.
+    """
+    if _unparsed(query):
+        return query.strip()
+    without_comments = _LITERAL_RE.sub(lambda m: ' ' if m.group(0)[0] in '-/' else m.group(0), query)
+    normalized = _TOKEN_RE.sub(lambda m: m.group(1) or ' ', without_comments)
+    return normalized.strip().rstrip(';').strip()
+
+
+def strip_literals(query):
+    """Blanks out comments, string literals and quoted identifiers, so keyword checks only see SQL.
+
+    Dollar-quoted strings and backslash escapes are not parsed; queries using
+    them are returned unchanged, so a quote inside them cannot hide a keyword.
+    """
+    if _unparsed(query):
+        return query
+    return _LITERAL_RE.sub(lambda m: ' ' if m.group(0)[0] in '-/' else "''", query)
+
+
+def parse_params(text):
+    """Parses a comma-separated parameter list into ints, floats and strings.
+
+    Quoted values may contain commas; a doubled quote inside them stands for one quote.
+    """
+    raw_params, current = [], ''
+    for m in _PARAM_TOKEN_RE.finditer(text):
+        if m.group(0) == ',':
+            raw_params.append(current)
+            current = ''
+        else:
+            current += m.group(0)
+    raw_params.append(current)
+
+    params = []
+    for raw in (p.strip() for p in raw_params):
+        if not raw:
+            continue
+        if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in "'\"":
+            params.append(raw[1:-1].replace(raw[0] * 2, raw[0]))
+            continue
+        for cast in (int, float):
+            try:
+                params.append(cast(raw))
+                break
+            except ValueError:
+                pass
+        else:
+            params.append(raw)
+    return params
+
+
+def sql_literal(value):
+    """Renders a Python value as a SQL literal (DuckDB's EXECUTE does not take bound parameters)."""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and not math.isfinite(value):
+        # repr() gives nan/inf, which DuckDB reads as column names
+        return f"'{value}'::DOUBLE"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class QueryTimeoutError(Exception):
+    """Raised when the watchdog interrupts a query that ran past its time limit."""
+
+    def __init__(self, elapsed, timeout):
+        super().__init__(f"Query cancelled after {elapsed:.1f} s (time limit {timeout:g} s).")
+        self.elapsed = elapsed
+        self.timeout = timeout
+
+
+class PooledCursor:
+    """A DuckDB cursor plus the prepared statements that live on it.
+
+    Each parameterized query shape is prepared once per cursor and reused.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self._statements = {}
+
+    def execute(self, sql, params=()):
+        if not params:
+            return self.cursor.execute(sql)
+        name = self._statements.get(sql)
+        if name is None:
+            name = f"iris_stmt_{len(self._statements) + 1}"
+            self.cursor.execute(f"PREPARE {name} AS {sql}")
+            self._statements[sql] = name
+        args = ', '.join(sql_literal(p) for p in params)
+        return self.cursor.execute(f"EXECUTE {name}({args})")
+
+    @property
+    def prepared_count(self):
+        return len(self._statements)
+
+
+class ConnectionPool:
+    """One in-memory DuckDB database per dataset, with cursors leased out per query.
+
+    The base table is registered once when the pool is created and every
+    cursor sees it; cursors run independently, so concurrent sessions no
+    longer serialize on a single connection. After registration the database
+    loses file and network access (except the dataset's own file and the
+    spill directory) and its settings are locked, so queries cannot write
+    files, load extensions or change limits.
+    """
+
+    def __init__(self, dataset, table_name='iris_table', size=POOL_SIZE,
+                 threads=POOL_THREADS, memory_limit=POOL_MEMORY_LIMIT, memory_mb=POOL_MEMORY_MB):
+        config = {}
+        if threads:
+            config['threads'] = int(threads)
+        config['memory_limit'] = memory_limit or f"{memory_mb}MB"
+        self.conn = duckdb.connect(database=':memory:', config=config)
+        dataset.register(self.conn, table_name)
+        self._lock_down(getattr(dataset, 'path', None))
+        self.threads, self.memory_limit = self.conn.execute(
+            "SELECT current_setting('threads'), current_setting('memory_limit')"
+        ).fetchone()
+        self.size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+        self._cursors = []
+        self._lock = threading.Lock()
+        self.killed = 0
+
+    def _lock_down(self, path):
+        if path is not None:
+            # File datasets are views that scan the file on every query
+            self.conn.execute(f"SET allowed_paths = [{sql_literal(path)}]")
+        temp_dir = self.conn.execute("SELECT current_setting('temp_directory')").fetchone()[0]
+        if temp_dir:
+            self.conn.execute(f"SET allowed_directories = [{sql_literal(temp_dir)}]")
+        self.conn.execute("SET enable_external_access = false")
+        self.conn.execute("SET lock_configuration = true")
+
+    @contextlib.contextmanager
+    def cursor(self):
+        """Leases a cursor for one query, blocking while all cursors are busy."""
+        self._slots.acquire()
+        try:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    pooled = PooledCursor(self.conn.cursor())
+                    self._cursors.append(pooled)
+            try:
+                yield pooled
+            finally:
+                self._idle.put(pooled)
+        finally:
+            self._slots.release()
+
+    def record_killed(self):
+        with self._lock:
+            self.killed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'cursors': len(self._cursors),
+                'idle': self._idle.qsize(),
+                'prepared_statements': sum(c.prepared_count for c in self._cursors),
+                'killed': self.killed,
+                'threads': self.threads,
+                'memory_limit': self.memory_limit,
+            }
+
+
+def get_connection_pool(dataset, table_name='iris_table'):
+    """The process-wide pool for a dataset version; the table is registered when it is first created."""
+    with _pool_lock:
+        return _pool_cache.get_or_compute(
+            (dataset.version, table_name), lambda: ConnectionPool(dataset, table_name=table_name)
+        )
+
+
+class QueryCache(LRUCache):
+    """LRU cache of query results under a memory budget, tracking the execution time it saved."""
+
+    def __init__(self, max_mb=QUERY_CACHE_MB, max_entries=256):
+        super().__init__(
+            max_entries=max_entries,
+            max_bytes=int(max_mb * 1024 * 1024),
+            sizeof=lambda entry: int(entry['result'].memory_usage(deep=True).sum()),
+        )
+        self.saved_seconds = 0.0
+
+    def get(self, key):
+        entry = super().get(key)
+        if entry is not None:
+            self.saved_seconds += entry['seconds']
+        return entry
+
+    def stats(self):
+        stats = super().stats()
+        stats['saved_seconds'] = self.saved_seconds
+        return stats
+
+
+def fetch_page(cursor, sql, params, page, page_size=PAGE_SIZE, max_rows=MAX_RESULT_ROWS, progress=None):
+    """Streams a query as Arrow record batches and keeps only the rows of one page.
+
+    Batches before the page are skipped and reading stops one row after it,
+    so memory stays at roughly one page whatever the size of the result.
+    Rows past max_rows are never returned. progress(fraction, message), when
+    given, is called after every batch. Returns (page_df, has_more).
+    """
+    start = page * page_size
+    stop = min(start + page_size, max_rows)
+    with span("sql: execute"):
+        reader = cursor.execute(sql, params).fetch_record_batch(page_size)
+    try:
+        batches, seen, has_more = [], 0, False
+        with span("sql: fetch batches"):
+            for batch in reader:
+                n = batch.num_rows
+                if seen + n > start and seen < stop:
+                    offset = max(start - seen, 0)
+                    batches.append(batch.slice(offset, min(n, stop - seen) - offset))
+                seen += n
+                if progress is not None:
+                    progress(min(seen / (stop + 1), 1.0), f"{seen:,} rows read")
+                if seen > stop:
+                    has_more = True
+                    break
+        with span("sql: to pandas"):
+            table = pa.Table.from_batches(batches, schema=reader.schema)
+            df = table.to_pandas()
+    finally:
+        reader.close()
+    return df, has_more
+
+
+def run_query(pool, cache, table_version, query, params=(), page=0, page_size=PAGE_SIZE,
+              timeout=QUERY_TIMEOUT_SECONDS, job=None, max_rows=MAX_RESULT_ROWS):
+    """Runs one page of a read-only query through the result cache.
+
+    Queries running longer than timeout seconds are interrupted and raise
+    QueryTimeoutError. When run as a background job, cancelling the job
+    interrupts the query too and raises JobCancelled.
+
+    Returns (page_df, info) where info says whether the page came from the
+    cache, how long the original execution took, and whether more rows
+    follow (has_more) or the row cap was reached (capped).
+    """
+    # Normalized text and typed values as the key, so 6 and 6.0 (or 1 and True) do not share results
+    key = (table_version, normalize_sql(query), tuple((type(p).__name__, p) for p in params), page, page_size,
+           max_rows)
+    entry = cache.get(key)
+    if entry is None:
+        start = time.perf_counter()
+        with pool.cursor() as cursor:
+            # Watchdog: interrupt the cursor if the query outlives its time limit
+            watchdog = threading.Timer(timeout, cursor.cursor.interrupt)
+            watchdog.daemon = True
+            watchdog.start()
+            unregister = job.on_cancel(cursor.cursor.interrupt) if job is not None else None
+            try:
+                result, has_more = fetch_page(
+                    cursor, query, params, page, page_size, max_rows,
+                    progress=job.report if job is not None else None
+                )
+            except duckdb.InterruptException:
+                if job is not None and job.cancelled:
+                    raise JobCancelled(job.id) from None
+                pool.record_killed()
+                raise QueryTimeoutError(time.perf_counter() - start, timeout) from None
+            finally:
+                watchdog.cancel()
+                if unregister is not None:
+                    unregister()
+        entry = {'result': result, 'has_more': has_more, 'seconds': time.perf_counter() - start}
+        cache.put(key, entry)
+        cached = False
+    else:
+        cached = True
+    last_row = page * page_size + len(entry['result'])
+    info = {
+        'cached': cached,
+        'seconds': entry['seconds'],
+        'page': page,
+        'first_row': page * page_size + 1 if len(entry['result']) else 0,
+        'last_row': last_row,
+        'has_more': entry['has_more'] and last_row < max_rows,
+        'capped': entry['has_more'] and last_row >= max_rows,
+    }
+    return entry['result'], info
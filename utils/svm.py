@@ -0,0 +1,137 @@
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC, LinearSVC
+
+from utils.profiling import measure_memory
+
+# Label shown on the page -> engine name passed to build_svm
+SVM_ENGINES = {
+    "Exact RBF kernel (SVC)": "svc",
+    "Linear (LinearSVC)": "linear",
+    "Nystroem RBF + linear SVM (SGD)": "nystroem",
+    "Random Fourier features + SGD (streaming)": "sgd",
+}
+# Kernel features for the approximate RBF engines
+N_COMPONENTS = 300
+# Row count assumed for SGD regularization when the training size is not known up front
+ASSUMED_SAMPLES = 10_000
+# Exact SVC is skipped in benchmarks above this many training rows
+EXACT_SVC_MAX_ROWS = 50_000
+
+
+def _gamma(n_features):
+    # SVC's gamma='scale' on standardized features
+    return 1.0 / n_features
+
+
+def _alpha(svm_c, n_samples):
+    # SGD minimises mean(hinge) + alpha/2 * |w|^2; with alpha = 1 / (C * n_samples) that is the
+    # SVM objective C * sum(hinge) + 1/2 * |w|^2 divided by C * n_samples, so C means the same as in SVC
+    return 1.0 / (svm_c * (n_samples or ASSUMED_SAMPLES))
+
+
+def build_svm(engine='svc', svm_c=1.0, random_state=None, n_features=4, n_components=N_COMPONENTS, n_samples=None):
+    """Pipeline steps after scaling for one SVM engine; the classifier step is always named 'svm'.
+
+    n_samples, the number of training rows when known, caps the Nystroem
+    components and sets the SGD engines' regularization to match C.
+    """
+    if engine == 'svc':
+        return [('svm', SVC(C=svm_c, random_state=random_state))]
+    if engine == 'linear':
+        return [('svm', LinearSVC(C=svm_c, random_state=random_state))]
+    if engine == 'nystroem':
+        # Hinge-loss SGD is a linear SVM on the kernel features; it scales far better
+        # than liblinear on hundreds of dense features. Nystroem cannot use more
+        # components than there are training rows.
+        return [
+            ('features', Nystroem(gamma=_gamma(n_features), n_components=min(n_components, n_samples or n_components),
+                                  random_state=random_state)),
+            ('svm', SGDClassifier(loss='hinge', alpha=_alpha(svm_c, n_samples), random_state=random_state)),
+        ]
+    if engine == 'sgd':
+        return [
+            ('features', RBFSampler(gamma=_gamma(n_features), n_components=n_components, random_state=random_state)),
+            ('svm', SGDClassifier(loss='hinge', alpha=_alpha(svm_c, n_samples), random_state=random_state)),
+        ]
+    raise ValueError(f"Unknown SVM engine '{engine}'")
+
+
+def streaming_svm(n_features, svm_c=1.0, random_state=None, n_components=N_COMPONENTS, n_samples=None):
+    """The streaming engine's (features, svm) steps, ready for svm.partial_fit on transformed chunks."""
+    steps = dict(build_svm('sgd', svm_c, random_state, n_features, n_components, n_samples=n_samples))
+    # RBFSampler only needs the number of features to draw its projection
+    steps['features'].fit(np.zeros((1, n_features)))
+    return steps['features'], steps['svm']
+
+
+def stream_train_svm(chunks_fn, svm_c=1.0, random_state=None, n_components=N_COMPONENTS, epochs=3):
+    """Trains the streaming SVM engine with partial_fit, one chunk at a time.
+
+    chunks_fn() must return a fresh iterator of (X, y) chunks each time it
+    is called: one pass fits the scaler and finds the classes, then each
+    epoch passes over the data again. Only one chunk is in memory at once.
+    Returns a fitted Pipeline(scaler, features, svm).
+    """
+    scaler = StandardScaler()
+    classes = set()
+    for X, y in chunks_fn():
+        scaler.partial_fit(X)
+        classes.update(np.unique(y).tolist())
+    classes = np.array(sorted(classes))
+
+    features, svm = streaming_svm(scaler.n_features_in_, svm_c, random_state, n_components,
+                                  n_samples=scaler.n_samples_seen_)
+    for _ in range(epochs):
+        for X, y in chunks_fn():
+            svm.partial_fit(features.transform(scaler.transform(X)), y, classes=classes)
+    return Pipeline([('scaler', scaler), ('features', features), ('svm', svm)])
+
+
+def _measure(fit_fn):
+    """Runs fit_fn and returns (result, seconds, peak MB traced above the start of the fit)."""
+    with measure_memory() as memory:
+        start = time.perf_counter()
+        result = fit_fn()
+        seconds = time.perf_counter() - start
+    return result, seconds, memory['peak'] / 1024 / 1024
+
+
+def benchmark_engines(X_train, y_train, X_test, y_test, engines, svm_c=1.0, random_state=None, chunk_rows=10_000):
+    """Trains each engine and reports training time, peak memory and test accuracy.
+
+    The streaming engine is fed chunk_rows rows at a time through partial_fit.
+    Exact SVC is skipped above EXACT_SVC_MAX_ROWS training rows.
+    """
+    rows = []
+    for label, engine in engines.items():
+        if engine == 'svc' and len(X_train) > EXACT_SVC_MAX_ROWS:
+            rows.append({'Engine': label, 'Train (s)': np.nan, 'Peak memory (MB)': np.nan,
+                         'Accuracy': np.nan, 'Note': f"skipped above {EXACT_SVC_MAX_ROWS:,} rows"})
+            continue
+        if engine == 'sgd':
+            def chunks():
+                for start in range(0, len(X_train), chunk_rows):
+                    yield X_train[start:start + chunk_rows], y_train[start:start + chunk_rows]
+            fit_fn = lambda: stream_train_svm(chunks, svm_c, random_state)
+            note = f"partial_fit, {chunk_rows:,}-row chunks"
+        else:
+            pipe = Pipeline([('scaler', StandardScaler()), *build_svm(engine, svm_c, random_state, X_train.shape[1],
+                                                                     n_samples=len(X_train))])
+            fit_fn = lambda pipe=pipe: pipe.fit(X_train, y_train)
+            note = ""
+        model, seconds, peak_mb = _measure(fit_fn)
+        rows.append({
+            'Engine': label,
+            'Train (s)': seconds,
+            'Peak memory (MB)': peak_mb,
+            'Accuracy': float(np.mean(model.predict(X_test) == y_test)),
+            'Note': note,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,101 @@
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+
+from utils.cache import LRUCache
+from utils.model_cache import build_pipelines
+
+# Worker processes for the sweep; -1 uses every core
+SWEEP_JOBS = int(os.environ.get('IRIS_SWEEP_JOBS', -1))
+SWEEP_PARAMS = {'knn': 'n_neighbors', 'svm': 'svm_c'}
+
+
+class SweepCache(LRUCache):
+    """LRU cache of cross-validated scores, one entry per (model, value, seed) grid cell."""
+
+
+def _pipeline(model, value, seed):
+    params = {'random_state': seed, 'n_neighbors': 5, 'svm_c': 1.0, SWEEP_PARAMS[model]: value}
+    return build_pipelines(**params)[model]
+
+
+def _fold_score(model, value, seed, fold, X, y, train_idx, test_idx):
+    """Fits one pipeline on one fold; runs in a worker process."""
+    pipe = clone(_pipeline(model, value, seed))
+    pipe.fit(X[train_idx], y[train_idx])
+    return model, value, seed, fold, float(np.mean(pipe.predict(X[test_idx]) == y[test_idx]))
+
+
+def cell_key(data_version, model, value, seed, n_folds):
+    return (data_version, model, value, seed, n_folds)
+
+
+def run_sweep(X, y, data_version, k_values, c_values, seeds, n_folds=5, cache=None,
+              n_jobs=SWEEP_JOBS, on_cell=None):
+    """Cross-validates KNN over k_values and SVM over c_values for every seed.
+
+    Folds are fanned out to a joblib process pool and collected as they
+    finish; when all folds of a grid cell are in, its scores are cached and
+    on_cell(cell) is called so the page can redraw. Cached cells are not
+    recomputed. Returns (cells, info) where cells is a list of dicts with
+    model, value, seed, mean, std and scores.
+    """
+    start = time.perf_counter()
+    grid = [('knn', k, seed) for k in k_values for seed in seeds]
+    grid += [('svm', c, seed) for c in c_values for seed in seeds]
+
+    cells, pending = [], []
+    for model, value, seed in grid:
+        cached = cache.get(cell_key(data_version, model, value, seed, n_folds)) if cache is not None else None
+        if cached is not None:
+            cells.append(cached)
+            if on_cell is not None:
+                on_cell(cached)
+        else:
+            pending.append((model, value, seed))
+
+    # Splits depend only on the seed, so they are computed once per seed
+    splits = {
+        seed: list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed).split(X, y))
+        for seed in {seed for _, _, seed in pending}
+    }
+    tasks = [
+        delayed(_fold_score)(model, value, seed, fold, X, y, train_idx, test_idx)
+        for model, value, seed in pending
+        for fold, (train_idx, test_idx) in enumerate(splits[seed])
+    ]
+
+    fold_scores = {}
+    if tasks:
+        parallel = Parallel(n_jobs=n_jobs, return_as='generator_unordered')
+        for model, value, seed, fold, score in parallel(tasks):
+            scores = fold_scores.setdefault((model, value, seed), {})
+            scores[fold] = score
+            if len(scores) < n_folds:
+                continue
+            values = [scores[i] for i in range(n_folds)]
+            cell = {
+                'model': model,
+                'value': value,
+                'seed': seed,
+                'mean': float(np.mean(values)),
+                'std': float(np.std(values)),
+                'scores': values,
+            }
+            if cache is not None:
+                cache.put(cell_key(data_version, model, value, seed, n_folds), cell)
+            cells.append(cell)
+            if on_cell is not None:
+                on_cell(cell)
+
+    info = {
+        'cells': len(grid),
+        'cached_cells': len(grid) - len(pending),
+        'fits': len(tasks),
+        'seconds': time.perf_counter() - start,
+    }
+    return cells, info
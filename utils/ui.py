@@ -0,0 +1,127 @@
+import os
+import time
+
+import streamlit as st
+
+from utils.data import DATASET_PATH_ENV, get_dataset, open_dataset
+from utils.figures import figure_stats
+from utils.jobs import JobExecutor, LatestJob
+from utils.profiling import background_spans, finish_rerun, start_rerun
+from utils.warmup import start_warmup
+
+# How often a page polls a running background job
+JOB_POLL_SECONDS = 0.5
+
+
+def dataset_source_sidebar():
+    """Sidebar picker for the dataset source; falls back to the built-in data on errors."""
+    st.sidebar.header("Dataset Source")
+    default_path = os.environ.get(DATASET_PATH_ENV, "")
+    source = st.sidebar.radio(
+        "Load data from:",
+        ["Built-in Iris", "Parquet/CSV file"],
+        index=1 if default_path else 0,
+        key="dataset_source",
+    )
+    if source == "Built-in Iris":
+        return get_dataset()
+
+    path = st.sidebar.text_input("File path on the server:", default_path, key="dataset_path")
+    if not path:
+        st.sidebar.info("Enter a path to a Parquet or CSV file with Iris-shaped columns.")
+        return get_dataset()
+    try:
+        dataset = open_dataset(path)
+    except Exception as e:
+        st.sidebar.error(f"Could not open dataset: {e}")
+        return get_dataset()
+    st.sidebar.caption(f"{dataset.label}: {dataset.n_rows:,} rows (scanned with DuckDB)")
+    return dataset
+
+
+def figure_stats_sidebar():
+    """Sidebar counters for the figure cache, to confirm figure memory stays flat across reruns."""
+    stats = figure_stats()
+    st.sidebar.subheader("Figure Cache")
+    st.sidebar.caption(
+        f"Hits: {stats['hits']} | Renders: {stats['renders']} | Entries: {stats['entries']} "
+        f"({stats['bytes'] / 1024:,.0f} KB)"
+    )
+    st.sidebar.caption(
+        f"Open figures: {stats['live_figures']} | Last render: {stats['last_render_seconds'] * 1000:,.0f} ms | "
+        f"Total render time: {stats['render_seconds']:,.2f} s"
+    )
+
+
+@st.cache_resource
+def get_job_executor():
+    """Background job pool shared by every page and session."""
+    return JobExecutor()
+
+
+def session_job(name):
+    """This session's LatestJob handle for one kind of background work."""
+    return st.session_state.setdefault(f"job_{name}", LatestJob())
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress(slot, label):
+    """Progress bar for the session's running job; reruns the page once the job has finished."""
+    job = slot.job
+    if job is None or job.done:
+        st.rerun()
+    text = f"{label}: {job.message or job.state} ({job.seconds:.1f} s)"
+    st.progress(job.progress, text=text)
+
+
+def start_page_trace(page):
+    """Starts the opt-in rerun profile for a page (IRIS_PROFILE=1); cProfile runs while its checkbox is on."""
+    return start_rerun(page, profile=st.session_state.get("profile_with_cprofile", False))
+
+
+def page_setup(page, **page_config):
+    """Shared start of every page script; call it before any other Streamlit command.
+
+    Applies st.set_page_config(**page_config) when given, starts the opt-in
+    background warm-up (IRIS_WARMUP=1) whichever page a session opens first,
+    and starts this rerun's timing spans (IRIS_PROFILE=1), which
+    debug_sidebar() shows at the end of the page.
+    """
+    if page_config:
+        st.set_page_config(**page_config)
+    start_warmup()
+    return start_page_trace(page)
+
+
+def debug_sidebar():
+    """Collapsible sidebar panel with this rerun's spans and trace/profile downloads; call it last."""
+    trace = finish_rerun()
+    if trace is None:
+        return
+    import pandas as pd
+
+    with st.sidebar.expander("Debug: Rerun Profile"):
+        st.caption(f"{trace.page}: {trace.seconds * 1000:,.0f} ms in {len(trace.spans)} spans")
+        if trace.spans:
+            st.dataframe(
+                pd.DataFrame(trace.summary()).style.format({'ms': '{:,.1f}', 'Memory Δ (MB)': '{:+,.2f}', 'Peak (MB)': '{:,.2f}'}),
+                hide_index=True,
+            )
+        st.checkbox("Record cProfile for each rerun", key="profile_with_cprofile")
+        st.download_button(
+            "Download Chrome trace (JSON)", data=trace.chrome_trace(),
+            file_name=f"rerun_trace_{int(trace.start * 1000)}.json", mime="application/json",
+        )
+        dump = trace.pstats_dump()
+        if dump is not None:
+            st.download_button(
+                "Download cProfile stats (.pstats)", data=dump,
+                file_name="rerun.pstats", mime="application/octet-stream",
+            )
+        spans = background_spans()
+        if spans:
+            st.caption("Outside reruns (downloads, background work):")
+            st.dataframe(pd.DataFrame([
+                {'Span': s['name'], 'ms': s['seconds'] * 1000, 'At': time.strftime('%H:%M:%S', time.localtime(s['at']))}
+                for s in spans[:20]
+            ]), hide_index=True)
@@ -0,0 +1,78 @@
+import importlib
+import os
+import threading
+import time
+
+# Set IRIS_WARMUP=1 to preload data, libraries and the default models when the server starts
+WARMUP_ENABLED = os.environ.get('IRIS_WARMUP', '').lower() in ('1', 'true', 'yes')
+# Libraries the pages import on first use, in the order they are usually needed
+WARMUP_MODULES = ['sklearn.datasets', 'sklearn.svm', 'matplotlib.pyplot', 'seaborn', 'plotly.express',
+                  'duckdb', 'reportlab.platypus']
+
+_status = {'state': 'idle', 'steps': {}, 'error': None}
+_lock = threading.Lock()
+
+
+def _step(name, fn):
+    start = time.perf_counter()
+    fn()
+    with _lock:
+        _status['steps'][name] = time.perf_counter() - start
+
+
+def _warm_models():
+    from utils.artifacts import ArtifactStore
+    from utils.data import get_dataset
+    from utils.model_cache import DEFAULT_MODEL_PARAMS, train_models
+
+    dataset = get_dataset()
+    X, y = dataset.to_numpy()
+    # Saved to the artifact store, so the Classification page's first visit loads them from disk
+    ArtifactStore().load_or_train(
+        dict(DEFAULT_MODEL_PARAMS, data_version=dataset.version),
+        lambda: train_models(X, y, dataset.categories, **DEFAULT_MODEL_PARAMS),
+    )
+
+
+def _warm_duckdb():
+    from utils.data import get_dataset
+    from utils.sql import get_connection_pool
+
+    # The same pool the SQL page uses, so its first query finds the table registered
+    with get_connection_pool(get_dataset()).cursor() as cursor:
+        cursor.execute("SELECT 1").fetchall()
+
+
+def _run():
+    from utils.data import get_dataset
+
+    try:
+        _step('imports', lambda: [importlib.import_module(name) for name in WARMUP_MODULES])
+        _step('dataset', lambda: (get_dataset().to_pandas(), get_dataset().to_arrow()))
+        _step('duckdb', _warm_duckdb)
+        _step('models', _warm_models)
+        state = 'done'
+    except Exception as e:
+        with _lock:
+            _status['error'] = str(e)
+        state = 'failed'
+    with _lock:
+        _status['state'] = state
+
+
+def start_warmup(force=False):
+    """Starts the background warm-up once per process when enabled; later calls are no-ops."""
+    if not (WARMUP_ENABLED or force):
+        return False
+    with _lock:
+        if _status['state'] != 'idle':
+            return False
+        _status['state'] = 'running'
+    threading.Thread(target=_run, name='iris-warmup', daemon=True).start()
+    return True
+
+
+def warmup_status():
+    """State of the warm-up ('idle', 'running', 'done' or 'failed') and seconds per step."""
+    with _lock:
+        return {'state': _status['state'], 'steps': dict(_status['steps']), 'error': _status['error']}